@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Semantic Retrieval Benchmark
+Measures recall@k and query latency of the local semantic index on the
+question_answering and multi_hop_reasoning examples of data/eval_dataset.json
+
+The conversation messages are indexed into a temporary directory; a message
+counts as relevant when its text appears in the example's `context` or
+`reasoning`. Abstractive examples without either are skipped.
+
+Usage:
+    python scripts/bench_retrieval.py
+    SEMANTIC_MODEL= python scripts/bench_retrieval.py   # hashing embedder only
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config import SearchConfig  # noqa: E402
+from semantic_index import SemanticIndex, create_embedder  # noqa: E402
+
+DATASET_PATH = "data/eval_dataset.json"
+TASK_TYPES = ("question_answering", "multi_hop_reasoning")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark semantic retrieval on the eval set")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    args = parser.parse_args()
+
+    with open(args.dataset) as f:
+        dataset = json.load(f)
+    messages = dataset["conversation"]["messages"]
+    examples = [ex for ex in dataset["evaluation_data"] if ex["task_type"] in TASK_TYPES]
+
+    config = SearchConfig.from_env()
+    embedder = create_embedder(config)
+    with tempfile.TemporaryDirectory() as directory:
+        index = SemanticIndex(directory, embedder)
+        start = time.perf_counter()
+        index.upsert([{"channel": "eval", "ts": str(m["id"]), "user": m["username"], "text": m["text"]}
+                      for m in messages])
+        index_seconds = time.perf_counter() - start
+
+        hits = {k: [] for k in args.k}
+        latencies = []
+        for example in examples:
+            evidence = (example.get("context", "") + " " + example.get("reasoning", "")).lower()
+            relevant = {str(m["id"]) for m in messages if m["text"].lower().rstrip(".!?") in evidence}
+            if not relevant:
+                continue
+
+            start = time.perf_counter()
+            results = index.search(example["question"], k=max(args.k))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            ranked = [hit["ts"] for hit in results]
+            for k in args.k:
+                hits[k].append(len(relevant & set(ranked[:k])) / len(relevant))
+
+    print(f"Embedder: {type(embedder).__name__} (dim {embedder.dim})")
+    print(f"Indexed {len(messages)} messages in {index_seconds * 1000:.0f} ms")
+    print(f"Queries: {len(latencies)} ({', '.join(TASK_TYPES)})")
+    for k in args.k:
+        print(f"  recall@{k:<3} {np.mean(hits[k]):.3f}")
+    p50, p95 = np.percentile(latencies, [50, 95])
+    print(f"  latency   p50 {p50:.2f} ms, p95 {p95:.2f} ms (includes query embedding)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Slack Workspace Exporter
+Incrementally exports channel history into the shape of data/eval_dataset.json
+(and a matching CSV) so evaluation datasets can be built from real channels
+
+Each channel keeps a high-water `ts` in <out-dir>/state.json, so re-runs only
+fetch messages newer than the last export. Every parent posted or replied to
+in the last `--thread-days` is tracked there too and polled on every run, so
+late replies to parents exported earlier are not missed. Messages are spooled
+to per-channel JSONL files page by page and the dataset files are rendered by
+streaming over the spools, so large channels never have to fit in memory.
+
+A channel's new messages are fetched in full before anything is written, and
+state.json records each spool's committed size: bytes appended by a run that
+failed before saving its state are truncated on the next run.
+
+Usage:
+    python scripts/export_workspace.py --channels C0123,C0456
+    python scripts/export_workspace.py --template data/eval_dataset.json --workers 4
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dotenv import load_dotenv
+from slack_sdk.errors import SlackApiError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from slack_api import create_client, paginate  # noqa: E402
+
+# Load environment variables
+load_dotenv()
+
+SLACK_BOT_TOKEN = os.getenv('SLACK_BOT_TOKEN')
+
+PAGE_SIZE = 200
+
+
+class RateLimiter:
+    """Token bucket shared by all export workers"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request slot is available"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class WorkspaceExporter:
+    """Exports channel history incrementally into per-channel spools"""
+
+    def __init__(self, client, out_dir, rate_per_minute=50, thread_days=14):
+        self.client = client
+        self.out_dir = out_dir
+        self.thread_days = thread_days
+        self.spool_dir = os.path.join(out_dir, "messages")
+        self.state_path = os.path.join(out_dir, "state.json")
+        self.limiter = RateLimiter(rate_per_minute)
+        self.state_lock = threading.Lock()
+        self.users = {}
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            state = json.load(f)
+        # Older state files only stored the channel's high-water ts
+        return {
+            channel: entry if isinstance(entry, dict) else {"ts": entry, "threads": {}}
+            for channel, entry in state.items()
+        }
+
+    def _spool_path(self, channel):
+        return os.path.join(self.spool_dir, f"{channel}.jsonl")
+
+    def _save_state(self):
+        """Write state atomically so an interrupted run never corrupts it"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.out_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _items(self, method, key, **kwargs):
+        """Yield items from every page of a Slack method under the shared rate limit"""
+        def limited(**call_kwargs):
+            self.limiter.wait()
+            return method(**call_kwargs)
+        return paginate(limited, key, limit=PAGE_SIZE, **kwargs)
+
+    def load_users(self):
+        """Map user ids to display names"""
+        for user in self._items(self.client.users_list, "members"):
+            self.users[user["id"]] = user.get("real_name") or user.get("name", user["id"])
+
+    def member_channels(self):
+        """Return ids of channels the bot can read"""
+        return [
+            channel["id"]
+            for channel in self._items(self.client.conversations_list, "channels",
+                                       types="public_channel,private_channel", exclude_archived=True)
+            if channel.get("is_member")
+        ]
+
+    def _record(self, channel, message):
+        """Convert a Slack message into a compact dataset record"""
+        username = message.get("username") or self.users.get(message.get("user"), message.get("user", ""))
+        return {
+            "channel": channel,
+            "ts": message["ts"],
+            "thread_ts": message.get("thread_ts"),
+            "username": username,
+            "text": message.get("text", ""),
+            "icon": (message.get("icons") or {}).get("emoji", ""),
+        }
+
+    def _replies(self, channel, parent_ts, oldest, threads):
+        """Fetch thread replies newer than `oldest`, excluding the parent
+
+        Records the newest reply ts in `threads` so later runs can poll the
+        thread for replies posted after its parent was exported.
+        """
+        replies = [
+            self._record(channel, reply)
+            for reply in self._items(self.client.conversations_replies, "messages",
+                                     channel=channel, ts=parent_ts, oldest=oldest)
+            if reply["ts"] != parent_ts
+        ]
+        latest_reply = max([threads.get(parent_ts, oldest)] + [reply["ts"] for reply in replies], key=float)
+        threads[parent_ts] = latest_reply
+        return replies
+
+    def _write_chunk(self, chunk_dir, chunk_paths, channel, messages, oldest, threads):
+        """Spill a newest-first batch of history to a chunk file in chronological order
+
+        Every parent is tracked in `threads` (until it has been quiet for
+        thread_days), including ones without replies yet.
+        """
+        chunk_path = os.path.join(chunk_dir, f"{len(chunk_paths):06d}.jsonl")
+        with open(chunk_path, "w") as chunk:
+            for message in reversed(messages):
+                records = [self._record(channel, message)]
+                if message.get("thread_ts", message["ts"]) == message["ts"]:
+                    if message.get("reply_count") and float(message.get("latest_reply", 0)) > float(oldest):
+                        records.extend(self._replies(channel, message["ts"], oldest, threads))
+                    else:
+                        threads[message["ts"]] = message.get("latest_reply", message["ts"])
+                for record in records:
+                    chunk.write(json.dumps(record, ensure_ascii=False) + "\n")
+        chunk_paths.append(chunk_path)
+
+    def export_channel(self, channel):
+        """Fetch messages newer than the channel's high-water ts; return the count"""
+        with self.state_lock:
+            entry = self.state.get(channel, {"ts": "0", "threads": {}})
+        oldest = entry["ts"]
+        latest = oldest
+        threads = dict(entry["threads"])
+        chunk_paths = []
+
+        with tempfile.TemporaryDirectory(dir=self.out_dir) as chunk_dir:
+            # New replies on threads whose parents were exported in earlier runs;
+            # deleted threads (or a channel the bot left) are no longer polled
+            thread_path = os.path.join(chunk_dir, "threads.jsonl")
+            with open(thread_path, "w") as chunk:
+                for parent_ts, latest_reply in entry["threads"].items():
+                    try:
+                        replies = self._replies(channel, parent_ts, latest_reply, threads)
+                    except SlackApiError as e:
+                        if e.response["error"] not in ("thread_not_found", "channel_not_found"):
+                            raise
+                        threads.pop(parent_ts, None)
+                        continue
+                    for record in replies:
+                        chunk.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            # History arrives newest-first: spill each page-sized batch to its own
+            # chunk file, then append the chunks to the spool in chronological order.
+            batch = []
+            for message in self._items(self.client.conversations_history, "messages",
+                                       channel=channel, oldest=oldest):
+                latest = max(latest, message["ts"], key=float)
+                batch.append(message)
+                if len(batch) >= PAGE_SIZE:
+                    self._write_chunk(chunk_dir, chunk_paths, channel, batch, oldest, threads)
+                    batch = []
+            if batch:
+                self._write_chunk(chunk_dir, chunk_paths, channel, batch, oldest, threads)
+
+            # Everything is fetched: append to the spool, dropping any bytes a
+            # failed run appended after the last committed size
+            count = 0
+            spool_path = self._spool_path(channel)
+            size = entry.get("size")
+            with open(spool_path, "a") as spool:
+                if size is not None and os.path.getsize(spool_path) > size:
+                    spool.truncate(size)
+                for chunk_path in list(reversed(chunk_paths)) + [thread_path]:
+                    with open(chunk_path) as chunk:
+                        for line in chunk:
+                            spool.write(line)
+                            count += 1
+                spool.flush()
+                os.fsync(spool.fileno())
+            size = os.path.getsize(spool_path)
+
+        # Stop polling threads that have been quiet for thread_days
+        cutoff = time.time() - self.thread_days * 86400
+        threads = {parent_ts: ts for parent_ts, ts in threads.items() if float(ts) >= cutoff}
+
+        with self.state_lock:
+            self.state[channel] = {"ts": latest, "threads": threads, "size": size}
+            self._save_state()
+        return count
+
+    def export(self, channels, workers=4):
+        """Export several channels concurrently"""
+        totals = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.export_channel, channel): channel for channel in channels}
+            for future in as_completed(futures):
+                channel = futures[future]
+                try:
+                    totals[channel] = future.result()
+                    print(f"✓ {channel}: {totals[channel]} new message(s)")
+                except SlackApiError as e:
+                    print(f"✗ {channel}: {e.response['error']}")
+        return totals
+
+    def _spooled(self, channels):
+        """Stream committed spooled records for the given channels"""
+        for channel in channels:
+            path = self._spool_path(channel)
+            if not os.path.exists(path):
+                continue
+            size = self.state.get(channel, {}).get("size")
+            read = 0
+            with open(path, "rb") as spool:
+                for line in spool:
+                    read += len(line)
+                    if size is not None and read > size:
+                        break
+                    yield json.loads(line)
+
+    def write_dataset(self, channels, json_path, csv_path, template=None):
+        """Stream the spools into the eval dataset JSON and CSV layouts"""
+        evaluation_data = []
+        metadata = {}
+        if template:
+            with open(template) as f:
+                dataset = json.load(f)
+            evaluation_data = dataset.get("evaluation_data", [])
+            metadata = dataset.get("metadata", {})
+
+        metadata.update({
+            "created_at": datetime.now().isoformat(),
+            "conversation_source": "slack_export",
+            "channels": channels,
+        })
+
+        count = 0
+        with open(json_path, "w") as out, open(csv_path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["id", "channel", "ts", "thread_ts", "username", "text", "icon"])
+
+            out.write('{\n  "metadata": ' + json.dumps(metadata, ensure_ascii=False))
+            out.write(',\n  "conversation": {\n    "messages": [')
+            for count, record in enumerate(self._spooled(channels), 1):
+                message = {"id": count, **record}
+                out.write(("," if count > 1 else "") + "\n      " + json.dumps(message, ensure_ascii=False))
+                writer.writerow([count, record["channel"], record["ts"], record["thread_ts"] or "",
+                                 record["username"], record["text"], record["icon"]])
+
+            out.write('\n    ],\n    "full_text": "')
+            first = True
+            for record in self._spooled(channels):
+                line = f"{record['username']}: {record['text']}"
+                out.write(("" if first else "\\n") + json.dumps(line, ensure_ascii=False)[1:-1])
+                first = False
+            out.write('"\n  },\n  "evaluation_data": ')
+            out.write(json.dumps(evaluation_data, ensure_ascii=False, indent=2))
+            out.write("\n}\n")
+        return count
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Incrementally export Slack channels into an eval dataset")
+    parser.add_argument("--channels", help="Comma-separated channel ids (default: all channels the bot is in)")
+    parser.add_argument("--out-dir", default="data/export")
+    parser.add_argument("--template", help="Existing dataset whose evaluation_data is carried over")
+    parser.add_argument("--workers", type=int, default=4, help="Channels fetched concurrently")
+    parser.add_argument("--rate", type=int, default=50, help="Slack requests per minute across all workers")
+    parser.add_argument("--thread-days", type=int, default=14,
+                        help="Keep polling threads for new replies until they are this many days quiet")
+    args = parser.parse_args()
+
+    if not SLACK_BOT_TOKEN:
+        print("✗ Error: SLACK_BOT_TOKEN not set in environment variables")
+        return
+
+    client = create_client(SLACK_BOT_TOKEN, max_retries=5)
+    exporter = WorkspaceExporter(client, args.out_dir, args.rate, args.thread_days)
+
+    exporter.load_users()
+    channels = args.channels.split(",") if args.channels else exporter.member_channels()
+    print(f"Exporting {len(channels)} channel(s) with {args.workers} worker(s)")
+
+    exporter.export(channels, args.workers)
+    count = exporter.write_dataset(
+        channels,
+        os.path.join(args.out_dir, "eval_dataset.json"),
+        os.path.join(args.out_dir, "messages.csv"),
+        template=args.template,
+    )
+    print(f"✓ Wrote {count} messages to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
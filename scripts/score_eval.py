@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Evaluation Scoring Engine
+Scores agent runs against data/eval_dataset.json with vectorized NumPy metrics,
+breaks results down by task_type / difficulty with bootstrap confidence
+intervals, and diffs two runs for quality, latency and token regressions
+
+A run is a JSONL file with one record per answered example (repetitions allowed):
+
+    {"example": 0, "prediction": "2.3%", "latency_ms": 812, "input_tokens": 950, "output_tokens": 40}
+
+`example` is the index into `evaluation_data`.
+
+Usage:
+    python scripts/score_eval.py runs/gpt-4o.jsonl
+    python scripts/score_eval.py runs/baseline.jsonl --compare runs/candidate.jsonl
+"""
+
+import argparse
+import json
+import re
+import string
+import sys
+
+import numpy as np
+
+DATASET_PATH = "data/eval_dataset.json"
+
+# Fields holding the reference answer, in order of preference
+GOLD_FIELDS = ("answer", "summary", "sentiment", "intent", "speaker",
+               "items", "entities", "extracted_tasks", "relationships")
+
+# Keys serialised (in order) from each element of list-valued gold answers
+LIST_KEYS = {
+    "items": ("action", "owner", "deadline"),
+    "entities": ("text",),
+    "extracted_tasks": ("task", "assignee", "due"),
+    "relationships": ("entity1", "relation", "entity2"),
+}
+
+QUALITY_METRICS = ("exact_match", "token_f1", "numeric_match", "contains_answer", "context_recall")
+COST_METRICS = ("latency_ms", "input_tokens", "output_tokens")
+
+_ARTICLES = re.compile(r"\b(a|an|the)\b")
+_PUNCTUATION = str.maketrans("", "", string.punctuation.replace("%", "").replace(".", ""))
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and articles, collapse whitespace"""
+    text = _ARTICLES.sub(" ", str(text).lower().translate(_PUNCTUATION))
+    return " ".join(text.replace(". ", " ").rstrip(".").split())
+
+
+def _map_unique(values, func):
+    """Apply func once per distinct string and broadcast back"""
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return np.array([func(value) for value in uniques], dtype=object)[inverse]
+
+
+def _token_matrix(texts, vocab):
+    """Encode texts as flat (row, token id) arrays"""
+    rows, tokens = [], []
+    for row, text in enumerate(texts):
+        ids = [vocab.setdefault(token, len(vocab)) for token in text.split()]
+        rows.extend([row] * len(ids))
+        tokens.extend(ids)
+    return np.asarray(rows, dtype=np.int64), np.asarray(tokens, dtype=np.int64)
+
+
+def _overlap(pred, gold, n_rows, vocab_size):
+    """Per-row multiset overlap between two token matrices"""
+    pred_keys, pred_counts = np.unique(pred[0] * vocab_size + pred[1], return_counts=True)
+    gold_keys, gold_counts = np.unique(gold[0] * vocab_size + gold[1], return_counts=True)
+    shared, pred_idx, gold_idx = np.intersect1d(pred_keys, gold_keys, return_indices=True)
+    common = np.minimum(pred_counts[pred_idx], gold_counts[gold_idx])
+    return np.bincount(shared // vocab_size, weights=common, minlength=n_rows)
+
+
+def _first_number(text):
+    match = _NUMBER.search(text)
+    return float(match.group()) if match else np.nan
+
+
+def _numeric_match(predictions, golds, tolerance):
+    """1 if any number in the prediction is within tolerance of the gold's first number"""
+    gold_values = np.array([_first_number(gold) for gold in golds], dtype=np.float64)
+    rows, values = [], []
+    for row, prediction in enumerate(predictions):
+        numbers = _NUMBER.findall(prediction)
+        rows.extend([row] * len(numbers))
+        values.extend(float(number) for number in numbers)
+    rows = np.asarray(rows, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+
+    target = gold_values[rows]
+    close = np.abs(values - target) <= tolerance * np.maximum(np.abs(target), 1.0)
+    hits = np.bincount(rows[close], minlength=len(golds)) > 0
+    return np.where(np.isnan(gold_values), np.nan, hits.astype(np.float64))
+
+
+def gold_text(example):
+    """Reference answer as text; list answers become one "; "-joined line per element"""
+    for field in GOLD_FIELDS:
+        value = example.get(field)
+        if not value:
+            continue
+        if isinstance(value, list):
+            keys = LIST_KEYS.get(field, ())
+            return "; ".join(
+                " ".join(str(item[key]) for key in keys if item.get(key)) if isinstance(item, dict) else str(item)
+                for item in value
+            )
+        return str(value)
+    return ""
+
+
+def load_dataset(path=DATASET_PATH):
+    """Return gold answers, contexts, task types and difficulties as arrays"""
+    with open(path) as f:
+        examples = json.load(f)["evaluation_data"]
+
+    gold = [gold_text(ex) for ex in examples]
+    unscored = [i for i, text in enumerate(gold) if not text]
+    if unscored:
+        print(f"Warning: {len(unscored)} examples have no gold answer and are not scored: {unscored}",
+              file=sys.stderr)
+    return {
+        "gold": np.array(gold, dtype=object),
+        "context": np.array([ex.get("context", "") for ex in examples], dtype=object),
+        "task_type": np.array([ex["task_type"] for ex in examples], dtype=object),
+        "difficulty": np.array([ex.get("difficulty", "n/a") for ex in examples], dtype=object),
+    }
+
+
+def load_run(path, dataset):
+    """Load a JSONL run into columnar arrays joined with the dataset"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+
+    example = np.array([record["example"] for record in records], dtype=np.int64)
+    run = {
+        "example": example,
+        "prediction": np.array([record.get("prediction") or "" for record in records], dtype=object),
+    }
+    for metric in COST_METRICS:
+        run[metric] = np.array([record.get(metric, np.nan) for record in records], dtype=np.float64)
+    for column, values in dataset.items():
+        run[column] = values[example]
+    return run
+
+
+def score(run, tolerance=0.01):
+    """Add all quality metric columns to a run (vectorized over rows)"""
+    n_rows = len(run["example"])
+    pred_norm = _map_unique(run["prediction"], normalize)
+    gold_norm = _map_unique(run["gold"], normalize)
+    context_norm = _map_unique(run["context"], normalize)
+
+    vocab = {}
+    pred_tokens = _token_matrix(pred_norm, vocab)
+    gold_tokens = _token_matrix(gold_norm, vocab)
+    context_tokens = _token_matrix(context_norm, vocab)
+
+    pred_len = np.bincount(pred_tokens[0], minlength=n_rows)
+    gold_len = np.bincount(gold_tokens[0], minlength=n_rows)
+    context_len = np.bincount(context_tokens[0], minlength=n_rows)
+
+    overlap = _overlap(pred_tokens, gold_tokens, n_rows, len(vocab))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f1 = np.nan_to_num(2 * overlap / (pred_len + gold_len))
+        run["token_f1"] = np.where(gold_len > 0, f1, np.nan)
+        context_overlap = _overlap(pred_tokens, context_tokens, n_rows, len(vocab))
+        run["context_recall"] = np.where(context_len > 0, context_overlap / context_len, np.nan)
+
+    run["exact_match"] = np.where(gold_len > 0, pred_norm == gold_norm, np.nan)
+    contains = np.char.find(pred_norm.astype(str), gold_norm.astype(str)) >= 0
+    run["contains_answer"] = np.where(gold_len > 0, contains, np.nan)
+    run["numeric_match"] = _numeric_match(pred_norm, gold_norm, tolerance)
+    return run
+
+
+def bootstrap_ci(values, n_boot=1000, alpha=0.05, seed=0):
+    """Mean and percentile bootstrap CI, ignoring NaNs"""
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan, np.nan, np.nan
+    rng = np.random.default_rng(seed)
+    # Draw resamples in chunks so the index matrix stays around 32 MB
+    chunk = max(1, (1 << 22) // len(values))
+    means = np.concatenate([
+        values[rng.integers(0, len(values), size=(min(chunk, n_boot - start), len(values)))].mean(axis=1)
+        for start in range(0, n_boot, chunk)
+    ])
+    low, high = np.percentile(means, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    return values.mean(), low, high
+
+
+def breakdown(run, by=("task_type", "difficulty"), n_boot=1000):
+    """Per-group metric means with bootstrap CIs"""
+    keys = run[by[0]].astype(str)
+    for column in by[1:]:
+        keys = np.char.add(np.char.add(keys, "/"), run[column].astype(str))
+    groups, inverse = np.unique(keys, return_inverse=True)
+
+    report = {"overall": {"n": len(keys)}}
+    for metric in QUALITY_METRICS:
+        report["overall"][metric] = bootstrap_ci(run[metric], n_boot)
+    for index, group in enumerate(groups):
+        mask = inverse == index
+        report[group] = {"n": int(mask.sum())}
+        for metric in QUALITY_METRICS:
+            report[group][metric] = bootstrap_ci(run[metric][mask], n_boot)
+    return report
+
+
+def _per_example(run, metric, n_examples):
+    """Mean of a metric per example index (NaN where unanswered)"""
+    valid = ~np.isnan(run[metric])
+    sums = np.bincount(run["example"][valid], weights=run[metric][valid], minlength=n_examples)
+    counts = np.bincount(run["example"][valid], minlength=n_examples)
+    with np.errstate(invalid="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def compare(base, candidate, n_examples, n_boot=1000, cost_threshold=0.10):
+    """Paired per-example diff of two scored runs, flagging regressions"""
+    report = {}
+    for metric in QUALITY_METRICS:
+        delta = _per_example(candidate, metric, n_examples) - _per_example(base, metric, n_examples)
+        mean, low, high = bootstrap_ci(delta, n_boot)
+        report[metric] = {"delta": mean, "ci": (low, high), "regression": bool(high < 0)}
+
+    for metric in COST_METRICS:
+        base_values = base[metric][~np.isnan(base[metric])]
+        cand_values = candidate[metric][~np.isnan(candidate[metric])]
+        if len(base_values) == 0 or len(cand_values) == 0:
+            continue
+        base_p50, base_p95 = np.percentile(base_values, [50, 95])
+        cand_p50, cand_p95 = np.percentile(cand_values, [50, 95])
+        report[metric] = {
+            "base": (base_p50, base_p95),
+            "candidate": (cand_p50, cand_p95),
+            "regression": bool(cand_p50 > base_p50 * (1 + cost_threshold)
+                               or cand_p95 > base_p95 * (1 + cost_threshold)),
+        }
+    return report
+
+
+def _format_ci(result):
+    mean, low, high = result
+    if np.isnan(mean):
+        return "      -        "
+    return f"{mean:5.3f} [{low:4.2f},{high:4.2f}]"
+
+
+def print_breakdown(report):
+    """Print a breakdown table"""
+    header = f"{'group':<40} {'n':>5} " + " ".join(f"{metric:>17}" for metric in QUALITY_METRICS)
+    print(header)
+    print("-" * len(header))
+    for group, row in report.items():
+        cells = " ".join(f"{_format_ci(row[metric]):>17}" for metric in QUALITY_METRICS)
+        print(f"{group:<40} {row['n']:>5} {cells}")
+
+
+def print_comparison(report):
+    """Print a run diff with regressions flagged"""
+    print(f"{'metric':<18} {'change':<36} flag")
+    print("-" * 60)
+    for metric, row in report.items():
+        flag = "⚠️ REGRESSION" if row["regression"] else ""
+        if "delta" in row:
+            change = f"{row['delta']:+.3f} [{row['ci'][0]:+.3f},{row['ci'][1]:+.3f}]"
+        else:
+            change = (f"p50 {row['base'][0]:.0f}->{row['candidate'][0]:.0f}, "
+                      f"p95 {row['base'][1]:.0f}->{row['candidate'][1]:.0f}")
+        print(f"{metric:<18} {change:<36} {flag}")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Score eval runs and compare them")
+    parser.add_argument("run", help="JSONL run to score (the baseline when comparing)")
+    parser.add_argument("--compare", help="Candidate JSONL run to diff against the baseline")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Relative numeric tolerance")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap resamples")
+    parser.add_argument("--cost-threshold", type=float, default=0.10,
+                        help="Relative latency/token increase flagged as a regression")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    base = score(load_run(args.run, dataset), args.tolerance)
+    print_breakdown(breakdown(base, n_boot=args.bootstrap))
+
+    if args.compare:
+        candidate = score(load_run(args.compare, dataset), args.tolerance)
+        print()
+        print_breakdown(breakdown(candidate, n_boot=args.bootstrap))
+        print()
+        report = compare(base, candidate, len(dataset["gold"]), args.bootstrap, args.cost_threshold)
+        print_comparison(report)
+        if any(row["regression"] for row in report.values()):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
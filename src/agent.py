@@ -2,40 +2,102 @@
 Azure AI Foundry Agent Management
 """
 
+import json
+import logging
 from typing import Optional
 from datetime import datetime
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import PromptAgentDefinition, MCPTool
+from azure.ai.projects.models import PromptAgentDefinition, MCPTool, FunctionTool
 
 from config import AppConfig
+from compactor import Compactor
+from mcp_client import MCPClient
+
+logger = logging.getLogger(__name__)
+
+
+def create_project_client(config: AppConfig) -> AIProjectClient:
+    """Azure AI Foundry project client with Azure credentials"""
+    return AIProjectClient(
+        endpoint=config.azure.endpoint,
+        credential=DefaultAzureCredential(),
+    )
+
+
+def delete_agent_version(project_client: AIProjectClient, agent_name: str, agent_version: str) -> bool:
+    """Delete an agent version; returns False (after logging) if it could not be deleted"""
+    try:
+        project_client.agents.delete_version(agent_name=agent_name, agent_version=agent_version)
+    except ResourceNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Failed to delete agent %s version %s: %s", agent_name, agent_version, e)
+        return False
+    return True
+
+
+def create_mcp_client(config: AppConfig) -> Optional[MCPClient]:
+    """Pooled MCP client for client mode (None in server mode)"""
+    if config.slack.mcp_mode != "client":
+        return None
+    return MCPClient(
+        config.slack.mcp_client_url,
+        max_concurrency=config.slack.mcp_concurrency,
+        compactor=Compactor(config.compactor)
+    )
 
 
 class SlackAgent:
     """Manages Azure AI Foundry agent with Slack MCP integration"""
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, mcp_client: Optional[MCPClient] = None):
         self.config = config
         self.project_client = None
         self.openai_client = None
         self.agent = None
         self.conversation_id = None
+        # A shared client passed in by the caller is not closed by close()
+        self.mcp_client = mcp_client
+        self._owns_mcp_client = mcp_client is None
+        # Names of tool calls the app executed for the last message (client mode)
+        self.last_tool_calls = []
+        # Token usage of the last message, summed over all tool rounds
+        self.last_usage = None
+
+    def _connect(self):
+        """Create Azure clients with Azure credentials"""
+        self.project_client = create_project_client(self.config)
+        self.openai_client = self.project_client.get_openai_client()
+
+        if self.mcp_client is None:
+            self.mcp_client = create_mcp_client(self.config)
+
+    def _slack_tools(self):
+        """Declare Slack tools for the agent definition"""
+        if self.mcp_client is None:
+            # Foundry calls the MCP server itself, with auto-approval
+            return [MCPTool(
+                server_label="slack",
+                server_url=self.config.slack.mcp_server_url,
+                require_approval="never"
+            )]
+
+        # Client mode: expose the MCP tools as function tools the app executes
+        return [
+            FunctionTool(
+                name=tool["name"],
+                description=tool.get("description", ""),
+                parameters=tool.get("inputSchema") or {"type": "object", "properties": {}},
+                strict=False
+            )
+            for tool in self.mcp_client.list_tools()
+        ]
 
     def initialize(self):
         """Initialize Azure AI Foundry agent"""
-        # Initialize clients with Azure credentials
-        self.project_client = AIProjectClient(
-            endpoint=self.config.azure.endpoint,
-            credential=DefaultAzureCredential(),
-        )
-        self.openai_client = self.project_client.get_openai_client()
-
-        # Create MCP tool with auto-approval
-        slack_mcp_tool = MCPTool(
-            server_label="slack",
-            server_url=self.config.slack.mcp_server_url,
-            require_approval="never"
-        )
+        self._connect()
 
         # Create agent
         self.agent = self.project_client.agents.create_version(
@@ -45,6 +107,8 @@ class SlackAgent:
                 instructions="""You are a helpful Slack workspace assistant.
 
 Use the available Slack MCP tools to help users query and interact with their workspace.
+When several independent reads are needed (e.g. history from multiple channels),
+request them together in one step.
 
 When responding:
 1. Be clear and concise
@@ -52,6 +116,17 @@ When responding:
 3. Cite specific messages or channels when relevant
 4. Provide actionable information
 
+For questions about channels and people, or to resolve channel or user IDs,
+call the `workspace_directory` tool first (when available) instead of listing
+channels or fetching channel info.
+
+For questions about what happened in a channel, summaries or action items,
+call the `channel_digest` tool first (when available) and only read raw
+history for details the digest does not cover.
+
+For paraphrased or vague questions, call `semantic_search` (when available)
+to locate relevant messages before reading whole channel histories.
+
 Available actions:
 - List channels
 - Read message history
@@ -59,7 +134,7 @@ Available actions:
 - Get channel information
 - Read thread replies
 """,
-                tools=[slack_mcp_tool],
+                tools=self._slack_tools(),
             ),
             description="Slack workspace AI assistant with MCP integration"
         )
@@ -69,34 +144,107 @@ Available actions:
 
         return self.agent
 
+    def attach(self, agent_name: str, agent_version: str, conversation_id: Optional[str] = None):
+        """Reconnect to an agent version created by another frontend replica"""
+        self._connect()
+        self.agent = self.project_client.agents.get_version(
+            agent_name=agent_name,
+            agent_version=agent_version
+        )
+        self.conversation_id = conversation_id or f"session-{self.agent.name}-{self.agent.version}"
+        return self.agent
+
+    def registry_entry(self) -> dict:
+        """Describe this agent so other replicas can attach to it"""
+        return {
+            "name": self.agent.name,
+            "version": self.agent.version,
+            "conversation_id": self.conversation_id
+        }
+
+    def _request_body(self, user_input: str) -> dict:
+        """Agent reference and trace metadata sent with every request"""
+        return {
+            "agent": {
+                "name": self.agent.name,
+                "type": "agent_reference"
+            },
+            "metadata": {
+                "session_id": self.conversation_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                "user_query": user_input[:100]
+            }
+        }
+
+    def _add_usage(self, response):
+        """Add a response's token usage to the running total for this message"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        if self.last_usage is None:
+            self.last_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        for key in self.last_usage:
+            self.last_usage[key] += getattr(usage, key, 0) or 0
+
     def send_message(self, user_input: str):
         """Send message to agent with trace metadata"""
         if not self.agent:
             raise RuntimeError("Agent not initialized. Call initialize() first.")
 
+        self.last_tool_calls = []
+        self.last_usage = None
         response = self.openai_client.responses.create(
             input=user_input,
-            extra_body={
-                "agent": {
-                    "name": self.agent.name,
-                    "type": "agent_reference"
-                },
-                "metadata": {
-                    "session_id": self.conversation_id,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "user_query": user_input[:100]
-                }
-            }
+            extra_body=self._request_body(user_input)
         )
+        self._add_usage(response)
+
+        # Client mode: run the requested tool calls in parallel and feed the
+        # outputs back until the model answers
+        for _ in range(self.config.slack.max_tool_rounds if self.mcp_client else 0):
+            calls = [item for item in response.output if item.type == "function_call"]
+            if not calls:
+                break
+
+            arguments = {}
+            for call in calls:
+                try:
+                    arguments[call.call_id] = json.loads(call.arguments or "{}")
+                except json.JSONDecodeError as e:
+                    logger.warning("Malformed arguments for %s: %s", call.name, e)
+            valid = [call for call in calls if call.call_id in arguments]
+            results = dict(zip(
+                (call.call_id for call in valid),
+                self.mcp_client.call_tools([(call.name, arguments[call.call_id]) for call in valid])
+            ))
+            # Malformed arguments are reported back so the model can retry the call
+            outputs = [
+                results.get(call.call_id, f"Error calling {call.name}: arguments are not valid JSON")
+                for call in calls
+            ]
+            self.last_tool_calls.extend(call.name for call in calls)
+
+            response = self.openai_client.responses.create(
+                input=[
+                    {"type": "function_call_output", "call_id": call.call_id, "output": output}
+                    for call, output in zip(calls, outputs)
+                ],
+                previous_response_id=response.id,
+                extra_body=self._request_body(user_input)
+            )
+            self._add_usage(response)
         return response
 
-    def cleanup(self):
-        """Clean up resources"""
-        if self.agent and self.project_client:
-            try:
-                self.project_client.agents.delete_version(
-                    agent_name=self.agent.name,
-                    agent_version=self.agent.version
-                )
-            except:
-                pass
+    def close(self):
+        """Close the OpenAI and project clients, and the MCP client if this agent owns it"""
+        if self.mcp_client and self._owns_mcp_client:
+            self.mcp_client.close()
+        self.mcp_client = None
+        for client in (self.openai_client, self.project_client):
+            if client is not None:
+                try:
+                    client.close()
+                except Exception as e:
+                    logger.warning("Failed to close %s: %s", type(client).__name__, e)
+        self.openai_client = None
+        self.project_client = None
@@ -0,0 +1,179 @@
+"""
+MCP Result Compaction
+Projects Slack MCP tool results down to the fields the model needs before they
+become input tokens on the next model step
+
+Handles the CSV tables returned by the Slack MCP server as well as JSON
+payloads (lists of messages or objects with a `messages` list). Rows are
+projected to a configurable (optionally per-tool) field set, user names are moved into a one-line
+legend keyed by user id, and long message texts are truncated. Pagination
+cursors are always kept so the agent can still page. Results that would not
+get smaller are passed through unchanged.
+"""
+
+import csv
+import io
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CompactorConfig
+
+# Map upstream column / key names onto canonical field names
+FIELD_ALIASES = {
+    "msgid": "ts",
+    "userid": "user",
+    "threadts": "thread_ts",
+}
+# Columns carrying a display name for the row's user
+NAME_FIELDS = ("realname", "real_name", "username", "user_name")
+ALWAYS_KEEP = ("cursor",)
+# `_meta` key the MCP proxy sets on tool results it has already compacted
+COMPACTED_META = "slack-assistant/compacted"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def _canonical(name: str) -> str:
+    key = name.strip().lower()
+    return FIELD_ALIASES.get(key, key)
+
+
+@dataclass
+class ToolStats:
+    """Compaction totals for one tool"""
+    calls: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "tokens_saved": self.tokens_in - self.tokens_out,
+        }
+
+
+@dataclass
+class Compactor:
+    """Compacts tool result text and tracks savings per tool"""
+    config: CompactorConfig
+    stats: Dict[str, ToolStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def applies_to(self, tool_name: str) -> bool:
+        return self.config.enabled and tool_name in self.config.tools
+
+    def compact(self, tool_name: str, text: str) -> str:
+        """Compact one text result and record the savings"""
+        fields = self.config.fields_for(tool_name)
+        compacted = self._compact_json(text, fields)
+        if compacted is None:
+            compacted = self._compact_csv(text, fields)
+        if compacted is None or len(compacted) >= len(text):
+            compacted = text
+
+        with self._lock:
+            stats = self.stats.setdefault(tool_name, ToolStats())
+            stats.calls += 1
+            stats.bytes_in += len(text.encode())
+            stats.bytes_out += len(compacted.encode())
+            stats.tokens_in += estimate_tokens(text)
+            stats.tokens_out += estimate_tokens(compacted)
+        return compacted
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Savings per tool"""
+        with self._lock:
+            return {tool: stats.as_dict() for tool, stats in self.stats.items()}
+
+    def _truncate(self, text: str) -> str:
+        limit = self.config.max_text_chars
+        if limit and len(text) > limit:
+            return text[:limit] + "…"
+        return text
+
+    def _project(self, rows: List[Dict[str, Any]],
+                 fields: Tuple[str, ...]) -> Tuple[List[str], List[List[Any]], Dict[str, str]]:
+        """Project rows to the given fields and collect a user legend"""
+        canonical_rows = [{_canonical(key): value for key, value in row.items()} for row in rows]
+        present = set().union(*canonical_rows) if canonical_rows else set()
+        columns = [name for name in fields if name in present]
+        columns += [name for name in ALWAYS_KEEP if name in present and name not in columns]
+
+        legend = {}
+        projected = []
+        for row in canonical_rows:
+            user = row.get("user")
+            name = next((row[key] for key in NAME_FIELDS if row.get(key)), None)
+            if user and name:
+                legend[str(user)] = str(name)
+            values = []
+            for column in columns:
+                value = row.get(column)
+                if column == "text" and isinstance(value, str):
+                    value = self._truncate(value)
+                values.append(value)
+            projected.append(values)
+        return columns, projected, legend
+
+    def _compact_csv(self, text: str, fields: Tuple[str, ...]) -> Optional[str]:
+        """Compact a CSV table whose header contains message fields"""
+        try:
+            reader = csv.DictReader(io.StringIO(text))
+            header = [_canonical(name) for name in (reader.fieldnames or [])]
+            if "text" not in header or len(header) < 2:
+                return None
+            rows = list(reader)
+        except csv.Error:
+            return None
+
+        columns, projected, legend = self._project(rows, fields)
+        out = io.StringIO()
+        if legend:
+            out.write("# users: " + "; ".join(f"{uid}={name}" for uid, name in legend.items()) + "\n")
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        for values in projected:
+            writer.writerow(["" if value is None else value for value in values])
+        return out.getvalue()
+
+    def _compact_json(self, text: str, fields: Tuple[str, ...]) -> Optional[str]:
+        """Compact a JSON list of messages or an object with a `messages` list"""
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return None
+
+        if isinstance(payload, list):
+            messages, extra = payload, {}
+        elif isinstance(payload, dict) and isinstance(payload.get("messages"), list):
+            messages = payload["messages"]
+            extra = {key: payload[key] for key in ("response_metadata", "has_more", "cursor") if key in payload}
+        else:
+            return None
+        if not messages or not all(isinstance(message, dict) for message in messages):
+            return None
+
+        for message in messages:
+            profile = message.get("user_profile") or {}
+            if profile.get("real_name") and "real_name" not in message:
+                message["real_name"] = profile["real_name"]
+
+        columns, projected, legend = self._project(messages, fields)
+        compacted = {"messages": [
+            {column: value for column, value in zip(columns, values) if value not in (None, "")}
+            for values in projected
+        ]}
+        if legend:
+            compacted["users"] = legend
+        compacted.update(extra)
+        return json.dumps(compacted, ensure_ascii=False, separators=(",", ":"))
@@ -3,7 +3,7 @@ Configuration management for Slack AI Assistant
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -11,6 +11,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _split(value: Optional[str], default: tuple) -> tuple:
+    """Parse a comma-separated environment value"""
+    if not value:
+        return default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
 @dataclass
 class AzureConfig:
     """Azure AI Foundry configuration"""
@@ -34,14 +41,220 @@ class SlackConfig:
     bot_token: str
     workspace: str
     mcp_server_url: str
+    # "server": Foundry calls the MCP server; "client": the app runs tool calls itself
+    mcp_mode: str = "server"
+    mcp_client_url: Optional[str] = None
+    mcp_concurrency: int = 8
+    max_tool_rounds: int = 8
 
     @classmethod
     def from_env(cls) -> "SlackConfig":
         """Load configuration from environment variables"""
+        mcp_server_url = os.environ.get("SLACK_MCP_SERVER_URL", "http://localhost:13080/mcp")
         return cls(
             bot_token=os.environ["SLACK_BOT_TOKEN"],
             workspace=os.environ.get("SLACK_WORKSPACE", "default"),
-            mcp_server_url=os.environ.get("SLACK_MCP_SERVER_URL", "http://localhost:13080/mcp")
+            mcp_server_url=mcp_server_url,
+            mcp_mode=os.environ.get("SLACK_MCP_MODE", "server").lower(),
+            mcp_client_url=os.environ.get("SLACK_MCP_CLIENT_URL", mcp_server_url),
+            mcp_concurrency=int(os.environ.get("SLACK_MCP_CONCURRENCY", "8")),
+            max_tool_rounds=int(os.environ.get("SLACK_MCP_MAX_TOOL_ROUNDS", "8"))
+        )
+
+
+@dataclass
+class SessionConfig:
+    """Session store configuration"""
+    store_url: str = "memory://"
+    max_messages: int = 200
+    max_sessions: int = 500
+    ttl_seconds: int = 86400
+
+    @classmethod
+    def from_env(cls) -> "SessionConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            store_url=os.environ.get("SESSION_STORE_URL", "memory://"),
+            max_messages=int(os.environ.get("SESSION_MAX_MESSAGES", "200")),
+            max_sessions=int(os.environ.get("SESSION_MAX_SESSIONS", "500")),
+            ttl_seconds=int(os.environ.get("SESSION_TTL_SECONDS", "86400"))
+        )
+
+
+@dataclass
+class LifecycleConfig:
+    """Live agent session lifecycle configuration"""
+    idle_timeout_seconds: int = 1800
+    max_sessions: int = 50
+    sweep_seconds: int = 60
+    delete_batch_size: int = 10
+    delete_attempts: int = 5
+
+    @classmethod
+    def from_env(cls) -> "LifecycleConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            idle_timeout_seconds=int(os.environ.get("AGENT_IDLE_TIMEOUT_SECONDS", "1800")),
+            max_sessions=int(os.environ.get("AGENT_MAX_LIVE_SESSIONS", "50")),
+            sweep_seconds=int(os.environ.get("AGENT_SWEEP_SECONDS", "60")),
+            delete_batch_size=int(os.environ.get("AGENT_DELETE_BATCH_SIZE", "10")),
+            delete_attempts=int(os.environ.get("AGENT_DELETE_ATTEMPTS", "5"))
+        )
+
+
+@dataclass
+class HistoryConfig:
+    """Persistent chat history configuration"""
+    directory: str = "data/history"
+    page_size: int = 20
+
+    @classmethod
+    def from_env(cls) -> "HistoryConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            directory=os.environ.get("HISTORY_DIR", "data/history"),
+            page_size=int(os.environ.get("HISTORY_PAGE_SIZE", "20"))
+        )
+
+
+@dataclass
+class SnapshotConfig:
+    """Workspace snapshot refresher configuration"""
+    interval_seconds: int = 300
+    users_every: int = 6
+    max_channels: int = 100
+    max_members: int = 20
+    max_users: int = 200
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0
+
+    @classmethod
+    def from_env(cls) -> "SnapshotConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            interval_seconds=int(os.environ.get("SNAPSHOT_REFRESH_SECONDS", "300")),
+            users_every=int(os.environ.get("SNAPSHOT_USERS_EVERY", "6")),
+            max_channels=int(os.environ.get("SNAPSHOT_MAX_CHANNELS", "100")),
+            max_members=int(os.environ.get("SNAPSHOT_MAX_MEMBERS", "20")),
+            max_users=int(os.environ.get("SNAPSHOT_MAX_USERS", "200"))
+        )
+
+
+def _tool_fields(value: Optional[str], default: dict) -> dict:
+    """Parse `tool=field,field;tool=field,...` into per-tool field sets"""
+    if not value:
+        return dict(default)
+    tool_fields = {}
+    for item in value.split(";"):
+        tool, _, fields = item.partition("=")
+        if tool.strip():
+            tool_fields[tool.strip()] = _split(fields, ())
+    return tool_fields
+
+
+@dataclass
+class CompactorConfig:
+    """MCP result compaction configuration"""
+    enabled: bool = True
+    fields: tuple = ("user", "ts", "text", "thread_ts")
+    max_text_chars: int = 500
+    tools: tuple = ("conversations_history", "conversations_replies", "conversations_search_messages")
+    # Field sets for tools whose results need more (or other) fields than `fields`;
+    # search results span channels, so they keep the channel
+    tool_fields: dict = field(default_factory=lambda: {
+        "conversations_search_messages": ("user", "ts", "text", "thread_ts", "channel"),
+    })
+
+    def fields_for(self, tool_name: str) -> tuple:
+        return self.tool_fields.get(tool_name, self.fields)
+
+    @classmethod
+    def from_env(cls) -> "CompactorConfig":
+        """Load configuration from environment variables"""
+        defaults = cls()
+        return cls(
+            enabled=os.environ.get("COMPACT_ENABLED", "true").lower() == "true",
+            fields=_split(os.environ.get("COMPACT_FIELDS"), defaults.fields),
+            max_text_chars=int(os.environ.get("COMPACT_MAX_TEXT_CHARS", "500")),
+            tools=_split(os.environ.get("COMPACT_TOOLS"), defaults.tools),
+            tool_fields=_tool_fields(os.environ.get("COMPACT_TOOL_FIELDS"), defaults.tool_fields)
+        )
+
+
+@dataclass
+class DigestConfig:
+    """Channel digest pipeline configuration"""
+    interval_seconds: int = 300
+    db_path: str = "data/digests.db"
+    channels: tuple = ()
+    lookback_hours: int = 24
+    max_items: int = 50
+    summarizer: str = "extractive"
+    users_refresh_seconds: int = 3600
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0
+
+    @classmethod
+    def from_env(cls) -> "DigestConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            interval_seconds=int(os.environ.get("DIGEST_REFRESH_SECONDS", "300")),
+            db_path=os.environ.get("DIGEST_DB_PATH", "data/digests.db"),
+            channels=_split(os.environ.get("DIGEST_CHANNELS"), ()),
+            lookback_hours=int(os.environ.get("DIGEST_LOOKBACK_HOURS", "24")),
+            max_items=int(os.environ.get("DIGEST_MAX_ITEMS", "50")),
+            summarizer=os.environ.get("DIGEST_SUMMARIZER", "extractive").lower(),
+            users_refresh_seconds=int(os.environ.get("DIGEST_USERS_REFRESH_SECONDS", "3600"))
+        )
+
+
+@dataclass
+class SearchConfig:
+    """Semantic message index configuration"""
+    enabled: bool = True
+    directory: str = "data/semantic"
+    model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    dim: int = 384
+    default_k: int = 8
+
+    @classmethod
+    def from_env(cls) -> "SearchConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            enabled=os.environ.get("SEMANTIC_INDEX_ENABLED", "true").lower() == "true",
+            directory=os.environ.get("SEMANTIC_INDEX_DIR", "data/semantic"),
+            model=os.environ.get("SEMANTIC_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+            dim=int(os.environ.get("SEMANTIC_DIM", "384")),
+            default_k=int(os.environ.get("SEMANTIC_TOP_K", "8"))
+        )
+
+
+@dataclass
+class ProxyConfig:
+    """Compacting MCP proxy configuration"""
+    upstream_url: str = "http://localhost:13080/mcp"
+    host: str = "0.0.0.0"
+    port: int = 13081
+    compactor: CompactorConfig = field(default_factory=CompactorConfig)
+    snapshot: SnapshotConfig = field(default_factory=SnapshotConfig)
+    digests: DigestConfig = field(default_factory=DigestConfig)
+    search: SearchConfig = field(default_factory=SearchConfig)
+
+    @classmethod
+    def from_env(cls) -> "ProxyConfig":
+        """Load configuration from environment variables"""
+        return cls(
+            upstream_url=os.environ.get("MCP_PROXY_UPSTREAM_URL", "http://localhost:13080/mcp"),
+            host=os.environ.get("MCP_PROXY_HOST", "0.0.0.0"),
+            port=int(os.environ.get("MCP_PROXY_PORT", "13081")),
+            compactor=CompactorConfig.from_env(),
+            snapshot=SnapshotConfig.from_env(),
+            digests=DigestConfig.from_env(),
+            search=SearchConfig.from_env()
         )
 
 
@@ -51,6 +264,9 @@ class AppConfig:
     azure: AzureConfig
     slack: SlackConfig
     debug: bool = False
+    session: SessionConfig = field(default_factory=SessionConfig)
+    history: HistoryConfig = field(default_factory=HistoryConfig)
+    compactor: CompactorConfig = field(default_factory=CompactorConfig)
 
     @classmethod
     def from_env(cls) -> "AppConfig":
@@ -58,5 +274,8 @@ class AppConfig:
         return cls(
             azure=AzureConfig.from_env(),
             slack=SlackConfig.from_env(),
-            debug=os.environ.get("DEBUG", "false").lower() == "true"
+            debug=os.environ.get("DEBUG", "false").lower() == "true",
+            session=SessionConfig.from_env(),
+            history=HistoryConfig.from_env(),
+            compactor=CompactorConfig.from_env()
         )
@@ -0,0 +1,262 @@
+"""
+Channel Digests
+Background pipeline keeping rolling per-channel digests (summary, decisions,
+action items, incident ids) so recurring "what happened in #channel" questions
+are answered from a local store instead of re-reading raw history
+
+Each refresh only folds in messages newer than the channel's last processed
+`ts`. Parents posted in the lookback window are re-read from history and
+threads whose `latest_reply` moved are fetched with `conversations.replies`,
+so replies to older parents are picked up too. Extraction is rule based; the rolling summary is extractive by default
+and can be delegated to a model via `summarizer`.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from config import DigestConfig
+from slack_api import create_client, iter_history, paginate, user_names
+
+SKIPPED_SUBTYPES = ("channel_join", "channel_leave")
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_PATTERN = re.compile(r"\b(?:INC|SEV|INCIDENT)-\d+\b", re.IGNORECASE)
+ACTION_PATTERN = re.compile(
+    r"\b(I'll|I will|I'm going to|can you|could you|please|need to|needs to|TODO|by EOD|by end of)\b",
+    re.IGNORECASE,
+)
+DECISION_PATTERN = re.compile(
+    r"\b(let's|we'll|we will|decided|agreed|approved|going with|we should|rolling back|roll back)\b",
+    re.IGNORECASE,
+)
+
+# summarizer(previous_summary, new_lines) -> updated summary
+Summarizer = Callable[[str, List[str]], str]
+
+
+def extractive_summary(previous: str, lines: List[str], max_lines: int = 5) -> str:
+    """Fallback summary: the most recent substantive lines, rolled forward"""
+    kept = [line[2:] for line in previous.splitlines() if line.startswith("- ")]
+    substantive = [line[:200] for line in lines if len(line.split(": ", 1)[-1].split()) >= 5]
+    recent = (kept + substantive)[-max_lines:]
+    if not recent:
+        return previous
+    return "Recent discussion:\n" + "\n".join(f"- {line}" for line in recent)
+
+
+def model_summarizer(openai_client, model: str) -> Summarizer:
+    """Summarizer that folds new messages into the previous summary with a model"""
+    def summarize(previous: str, lines: List[str]) -> str:
+        response = openai_client.responses.create(
+            model=model,
+            input=(
+                "Update this Slack channel summary with the new messages. "
+                "Keep it under 120 words and mention concrete decisions and owners.\n\n"
+                f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+            ),
+        )
+        return response.output_text.strip()
+    return summarize
+
+
+class DigestStore:
+    """SQLite-backed digest storage shared between processes"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "channel TEXT PRIMARY KEY, name TEXT, last_ts TEXT, updated_at REAL, body TEXT)"
+            )
+
+    def get(self, channel: str) -> Optional[Dict[str, Any]]:
+        """Fetch a digest by channel id or name (with or without '#')"""
+        key = channel.lstrip("#")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM digests WHERE channel = ? OR name = ?", (key, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, digest: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digests (channel, name, last_ts, updated_at, body) VALUES (?, ?, ?, ?, ?)",
+                (digest["channel"], digest["name"], digest["last_ts"], time.time(), json.dumps(digest)),
+            )
+
+    def channels(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM digests ORDER BY name")]
+
+
+def update_digest(digest: Dict[str, Any], messages: List[Dict[str, Any]], users: Dict[str, str],
+                  summarizer: Summarizer, max_items: int) -> Dict[str, Any]:
+    """Fold new messages (oldest first) into a digest"""
+    lines = []
+    for message in messages:
+        text = message.get("text", "")
+        author = message.get("username") or users.get(message.get("user"), message.get("user", "unknown"))
+        item = {"ts": message["ts"], "user": author, "text": text[:300]}
+        lines.append(f"{author}: {text}")
+
+        for incident in INCIDENT_PATTERN.findall(text):
+            if incident.upper() not in digest["incidents"]:
+                digest["incidents"].append(incident.upper())
+        if ACTION_PATTERN.search(text):
+            digest["action_items"].append(item)
+        if DECISION_PATTERN.search(text):
+            digest["decisions"].append(item)
+
+    for key in ("action_items", "decisions"):
+        digest[key] = digest[key][-max_items:]
+    digest["incidents"] = digest["incidents"][-max_items:]
+    digest["message_count"] += len(messages)
+    if messages:
+        digest["last_ts"] = messages[-1]["ts"]
+        digest["summary"] = summarizer(digest["summary"], lines)
+    return digest
+
+
+def render_digest(digest: Dict[str, Any], since_hours: Optional[float] = None) -> str:
+    """Render a digest as compact text, optionally limited to recent items"""
+    cutoff = time.time() - since_hours * 3600 if since_hours else 0.0
+    if digest["last_ts"]:
+        updated = datetime.fromtimestamp(float(digest["last_ts"]), tz=timezone.utc)
+        latest = f"latest {updated:%Y-%m-%d %H:%M} UTC"
+    else:
+        latest = "no messages yet"
+
+    lines = [f"#{digest['name']} digest ({digest['message_count']} messages processed, {latest})"]
+    if digest["summary"]:
+        lines += ["", digest["summary"]]
+    for key, title in (("decisions", "Decisions"), ("action_items", "Action items")):
+        items = [item for item in digest[key] if float(item["ts"]) >= cutoff]
+        if items:
+            lines += ["", f"{title}:"]
+            lines += [f"- {item['user']}: {item['text']} (ts {item['ts']})" for item in items]
+    if digest["incidents"]:
+        lines += ["", "Incidents: " + ", ".join(digest["incidents"])]
+    return "\n".join(lines)
+
+
+class DigestPipeline:
+    """Refreshes channel digests incrementally in a background thread"""
+
+    def __init__(self, client, store: DigestStore, config: DigestConfig,
+                 summarizer: Optional[Summarizer] = None):
+        self.client = client
+        self.store = store
+        self.config = config
+        self.summarizer = summarizer or extractive_summary
+        self.users: Dict[str, str] = {}
+        self._users_loaded_at = 0.0
+        # listener(channel_id, channel_name, messages) is called with each batch of new messages
+        self.listeners: List[Callable[[str, str, List[Dict[str, Any]]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, token: str, config: DigestConfig,
+                    summarizer: Optional[Summarizer] = None) -> "DigestPipeline":
+        """Create a pipeline backed by a rate-limit aware Slack client"""
+        return cls(create_client(token), DigestStore(config.db_path), config, summarizer)
+
+    def start(self):
+        """Refresh in a daemon thread every config.interval_seconds"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="channel-digests", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except SlackApiError as e:
+                logger.warning("Digest refresh failed: %s", e.response.get("error"))
+            except Exception:
+                logger.exception("Digest refresh failed")
+            self._stop.wait(self.config.interval_seconds)
+
+    def _channels(self) -> Dict[str, str]:
+        """Channel ids to names for configured (or all joined) channels"""
+        channels = {}
+        for channel in paginate(self.client.conversations_list, "channels",
+                                types="public_channel,private_channel", exclude_archived=True):
+            wanted = (channel["id"] in self.config.channels or channel.get("name") in self.config.channels)
+            if wanted or (not self.config.channels and channel.get("is_member")):
+                channels[channel["id"]] = channel.get("name", channel["id"])
+        return channels
+
+    def _new_messages(self, channel_id: str, digest: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """New top-level messages and thread replies since the digest was last updated
+
+        Re-reads parents from the lookback window (or since last_ts, if older)
+        and fetches replies for threads whose latest_reply is newer than the
+        reply last seen; digest["threads"] tracks that per parent.
+        """
+        window = time.time() - self.config.lookback_hours * 3600
+        last_ts = float(digest["last_ts"] or window)
+        threads = digest.setdefault("threads", {})
+        oldest = str(min(last_ts, window))
+
+        messages = []
+        parents = set()
+        for message in iter_history(self.client, channel_id, oldest=oldest):
+            if float(message["ts"]) > last_ts and message.get("subtype") not in SKIPPED_SUBTYPES:
+                messages.append(message)
+            if not message.get("reply_count"):
+                continue
+            parent_ts = message["ts"]
+            parents.add(parent_ts)
+            seen = threads.get(parent_ts, str(max(last_ts, float(parent_ts))))
+            if float(message.get("latest_reply", 0)) > float(seen):
+                messages.extend(
+                    reply for reply in paginate(self.client.conversations_replies, "messages",
+                                                channel=channel_id, ts=parent_ts, oldest=seen)
+                    if reply["ts"] != parent_ts and float(reply["ts"]) > float(seen)
+                )
+                threads[parent_ts] = message["latest_reply"]
+
+        # Threads whose parent left the window are no longer polled
+        digest["threads"] = {parent_ts: ts for parent_ts, ts in threads.items() if parent_ts in parents}
+        return sorted(messages, key=lambda message: float(message["ts"]))
+
+    def refresh(self):
+        """Fold messages newer than each channel's last processed ts into its digest"""
+        if not self.users or time.time() - self._users_loaded_at >= self.config.users_refresh_seconds:
+            self.users = user_names(self.client)
+            self._users_loaded_at = time.time()
+
+        for channel_id, name in self._channels().items():
+            digest = self.store.get(channel_id) or {
+                "channel": channel_id, "name": name, "last_ts": None, "summary": "",
+                "decisions": [], "action_items": [], "incidents": [], "message_count": 0,
+            }
+            messages = self._new_messages(channel_id, digest)
+            if not messages and digest["last_ts"]:
+                self.store.put(digest)
+                continue
+
+            for listener in self.listeners:
+                try:
+                    listener(channel_id, name, messages)
+                except Exception:
+                    logger.exception("Digest listener failed for %s", name)
+            digest["name"] = name
+            self.store.put(update_digest(digest, messages, self.users, self.summarizer, self.config.max_items))
@@ -0,0 +1,150 @@
+"""
+Chat History Log
+Append-only on-disk log of conversation turns with a per-user index
+
+Layout under the history directory:
+
+    <user>/index.jsonl          one line per conversation (id, title, created)
+    <user>/<conversation>.log   one compact JSON line per turn
+    <user>/<conversation>.idx   little-endian uint64 byte offset of each turn
+
+where <user> is the SHA-256 of the user id, so distinct ids never share a
+directory.
+
+The offset file lets a page of turns be read with a single seek, so reopening
+a conversation only loads the last page and older pages are read on demand.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+OFFSET = struct.Struct("<Q")
+
+# Compact on-disk keys for turn fields
+_FIELDS = {
+    "role": "r",
+    "content": "c",
+    "tool_calls": "t",
+    "usage": "u",
+    "response_id": "id",
+    "created": "at",
+}
+_KEYS = {short: name for name, short in _FIELDS.items()}
+
+
+def _safe_name(value: str) -> str:
+    """Make a conversation id safe to use as a file name"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:128] or "_"
+
+
+def encode_turn(turn: Dict[str, Any]) -> bytes:
+    """Serialize a turn to one compact JSON line, dropping empty fields"""
+    record = {_FIELDS[key]: value for key, value in turn.items()
+              if key in _FIELDS and value not in (None, 0, "", [], {})}
+    record.setdefault("at", int(time.time()))
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_turn(line: bytes) -> Dict[str, Any]:
+    """Deserialize a turn written by encode_turn"""
+    record = json.loads(line)
+    return {_KEYS.get(key, key): value for key, value in record.items()}
+
+
+class HistoryLog:
+    """Append-only chat history store with paged reads"""
+
+    def __init__(self, directory: str, page_size: int = 20):
+        self.directory = directory
+        self.page_size = page_size
+
+    def _user_dir(self, user_id: str, create: bool = False) -> str:
+        path = os.path.join(self.directory, hashlib.sha256(user_id.encode()).hexdigest())
+        if create:
+            os.makedirs(path, exist_ok=True)
+        return path
+
+    def _paths(self, user_id: str, conversation_id: str, create: bool = False) -> Tuple[str, str]:
+        base = os.path.join(self._user_dir(user_id, create), _safe_name(conversation_id))
+        return base + ".log", base + ".idx"
+
+    def start_conversation(self, user_id: str, title: str = "") -> str:
+        """Register a new conversation in the user's index and return its id"""
+        conversation_id = uuid.uuid4().hex[:16]
+        entry = {"id": conversation_id, "title": title[:80], "created": int(time.time())}
+        index_path = os.path.join(self._user_dir(user_id, create=True), "index.jsonl")
+        with open(index_path, "ab") as index:
+            fcntl.flock(index, fcntl.LOCK_EX)
+            index.write(json.dumps(entry, ensure_ascii=False).encode() + b"\n")
+        return conversation_id
+
+    def list_conversations(self, user_id: str) -> List[Dict[str, Any]]:
+        """Return the user's conversations, newest first"""
+        index_path = os.path.join(self._user_dir(user_id), "index.jsonl")
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, "rb") as index:
+            entries = [json.loads(line) for line in index if line.strip()]
+        return entries[::-1]
+
+    def append(self, user_id: str, conversation_id: str, turn: Dict[str, Any]) -> int:
+        """Append a turn and return its position in the conversation"""
+        log_path, idx_path = self._paths(user_id, conversation_id, create=True)
+        line = encode_turn(turn)
+        with open(log_path, "ab") as log, open(idx_path, "ab") as idx:
+            fcntl.flock(log, fcntl.LOCK_EX)
+            offset = log.seek(0, os.SEEK_END)
+            log.write(line)
+            log.flush()
+            position = idx.seek(0, os.SEEK_END) // OFFSET.size
+            idx.write(OFFSET.pack(offset))
+        return position
+
+    def count(self, user_id: str, conversation_id: str) -> int:
+        """Number of turns in a conversation"""
+        _, idx_path = self._paths(user_id, conversation_id)
+        try:
+            return os.path.getsize(idx_path) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def read(self, user_id: str, conversation_id: str, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Read turns [start, stop) using the offset index"""
+        total = self.count(user_id, conversation_id)
+        start, stop = max(0, start), min(stop, total)
+        if start >= stop:
+            return []
+
+        log_path, idx_path = self._paths(user_id, conversation_id)
+        with open(idx_path, "rb") as idx:
+            idx.seek(start * OFFSET.size)
+            begin = OFFSET.unpack(idx.read(OFFSET.size))[0]
+            if stop < total:
+                idx.seek(stop * OFFSET.size)
+                end = OFFSET.unpack(idx.read(OFFSET.size))[0]
+            else:
+                end = None
+
+        with open(log_path, "rb") as log:
+            log.seek(begin)
+            data = log.read() if end is None else log.read(end - begin)
+        return [decode_turn(line) for line in data.splitlines()[:stop - start]]
+
+    def load_page(self, user_id: str, conversation_id: str,
+                  before: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Load the page of turns ending at `before` (default: the latest page)
+
+        Returns the turns and the position of the first one, which is the
+        `before` value for the next older page.
+        """
+        if before is None:
+            before = self.count(user_id, conversation_id)
+        start = max(0, before - self.page_size)
+        return self.read(user_id, conversation_id, start, before), start
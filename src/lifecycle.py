@@ -0,0 +1,228 @@
+"""
+Session Lifecycle Management
+Process-wide registry of live agent handles with idle timeouts and an LRU cap
+
+Evicted sessions have their clients closed immediately, unless a request is
+in flight on the handle: those evictions are deferred to the sweeper. Agent
+versions are queued and deleted in batches by a background sweeper so
+eviction never blocks a page render. Versions whose session may still be in use (e.g. on
+another replica) are retained and re-checked on every sweep, and failed
+deletions are retried.
+"""
+
+import logging
+import os
+import resource
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import LifecycleConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LiveSession:
+    """An agent handle and when it was last used"""
+    agent_manager: object
+    last_seen: float
+
+
+def memory_usage_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # Peak RSS (KB on Linux) where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SessionManager:
+    """Tracks live sessions, evicting idle and least recently used ones"""
+
+    def __init__(self, config: LifecycleConfig,
+                 delete_version: Callable[[str, str], bool],
+                 on_evict: Optional[Callable[[str], bool]] = None):
+        self.config = config
+        # delete_version(agent_name, agent_version) -> whether the version is gone
+        self.delete_version = delete_version
+        # on_evict(session_id) -> whether the session's agent version may be deleted now
+        self.on_evict = on_evict
+        self._sessions: "OrderedDict[str, LiveSession]" = OrderedDict()
+        # Agent versions waiting to be deleted, and ones retained until their session is idle
+        self._pending_deletes: List[Dict[str, Any]] = []
+        self._retained: Dict[str, Dict[str, Any]] = {}
+        # Requests in flight per handle (by id), and evictions waiting for them to finish
+        self._in_flight: Dict[int, int] = {}
+        self._deferred: List[Tuple[str, LiveSession, Optional[bool]]] = []
+        self._evicted = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Sweep idle sessions and flush deletions in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.config.sweep_seconds):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def _deletable(self, session_id: str) -> bool:
+        return self.on_evict(session_id) if self.on_evict else True
+
+    @contextmanager
+    def in_use(self, agent_manager):
+        """Mark a handle busy so eviction does not close it mid-request"""
+        key = id(agent_manager)
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield agent_manager
+        finally:
+            with self._lock:
+                self._in_flight[key] -= 1
+                if not self._in_flight[key]:
+                    del self._in_flight[key]
+
+    def get(self, session_id: str):
+        """Return the live agent handle for a session and mark it used"""
+        with self._lock:
+            live = self._sessions.get(session_id)
+            if live is None:
+                return None
+            live.last_seen = time.time()
+            self._sessions.move_to_end(session_id)
+            return live.agent_manager
+
+    def register(self, session_id: str, agent_manager):
+        """Track a new agent handle, evicting the LRU sessions over the cap"""
+        agent = getattr(agent_manager, "agent", None)
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            self._sessions[session_id] = LiveSession(agent_manager, time.time())
+            evicted = []
+            while len(self._sessions) > self.config.max_sessions:
+                evicted.append(self._sessions.popitem(last=False))
+
+            # The session is back: keep its retained version if the new handle
+            # reattached to it, otherwise it is no longer needed
+            retained = self._retained.pop(session_id, None)
+            if retained is not None and (agent is None or retained["version"] != agent.version):
+                self._pending_deletes.append(retained)
+
+        if previous is not None and previous.agent_manager is not agent_manager:
+            previous_agent = previous.agent_manager.agent
+            if agent is not None and previous_agent is not None and previous_agent.version == agent.version:
+                # Same version, now used by the new handle
+                previous.agent_manager.close()
+            else:
+                self._evict(session_id, previous, delete_agent=True)
+        for evicted_id, live in evicted:
+            self._evict(evicted_id, live)
+
+    def release(self, session_id: str, delete_agent: bool = True):
+        """Drop a session now (e.g. on reset)"""
+        with self._lock:
+            live = self._sessions.pop(session_id, None)
+        if live is not None:
+            self._evict(session_id, live, delete_agent)
+
+    def sweep(self):
+        """Evict idle sessions, queue retained versions that became idle and flush deletions"""
+        cutoff = time.time() - self.config.idle_timeout_seconds
+        with self._lock:
+            idle = [(session_id, live) for session_id, live in self._sessions.items()
+                    if live.last_seen < cutoff]
+            for session_id, _ in idle:
+                del self._sessions[session_id]
+            retained = list(self._retained)
+            deferred, self._deferred = self._deferred, []
+        for session_id, live in idle:
+            self._evict(session_id, live)
+        for session_id, live, delete_agent in deferred:
+            self._evict(session_id, live, delete_agent)
+
+        for session_id in retained:
+            if self._deletable(session_id):
+                with self._lock:
+                    entry = self._retained.pop(session_id, None)
+                    if entry is not None:
+                        self._pending_deletes.append(entry)
+        self.flush_deletes()
+
+    def _evict(self, session_id: str, live: LiveSession, delete_agent: Optional[bool] = None):
+        """Close a session's clients and queue (or retain) its agent version
+
+        Handles with a request in flight are left for the next sweep.
+        """
+        with self._lock:
+            if id(live.agent_manager) in self._in_flight:
+                self._deferred.append((session_id, live, delete_agent))
+                return
+        agent = getattr(live.agent_manager, "agent", None)
+        live.agent_manager.close()
+        if agent is not None and delete_agent is None:
+            delete_agent = self._deletable(session_id)
+
+        with self._lock:
+            self._evicted += 1
+            if agent is not None:
+                entry = {"session_id": session_id, "name": agent.name,
+                         "version": agent.version, "attempts": 0}
+                if delete_agent:
+                    self._pending_deletes.append(entry)
+                else:
+                    self._retained[session_id] = entry
+            flush = len(self._pending_deletes) >= self.config.delete_batch_size
+        if flush:
+            threading.Thread(target=self.flush_deletes, name="agent-deletes", daemon=True).start()
+
+    def flush_deletes(self):
+        """Delete queued agent versions in batches; failures are retried on later sweeps"""
+        failed = []
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending_deletes[:self.config.delete_batch_size]
+                    del self._pending_deletes[:len(batch)]
+                if not batch:
+                    break
+                for entry in batch:
+                    if self.delete_version(entry["name"], entry["version"]):
+                        continue
+                    entry["attempts"] += 1
+                    if entry["attempts"] < self.config.delete_attempts:
+                        failed.append(entry)
+                    else:
+                        logger.error("Giving up deleting agent %s version %s after %d attempts",
+                                     entry["name"], entry["version"], entry["attempts"])
+        with self._lock:
+            self._pending_deletes.extend(failed)
+
+    def stats(self) -> Dict[str, float]:
+        """Live session count, pending and retained deletions, and process memory"""
+        with self._lock:
+            return {
+                "live_sessions": len(self._sessions),
+                "max_sessions": self.config.max_sessions,
+                "evicted": self._evicted,
+                "pending_deletes": len(self._pending_deletes),
+                "retained_versions": len(self._retained),
+                "deferred_evictions": len(self._deferred),
+                "memory_mb": round(memory_usage_mb(), 1),
+            }
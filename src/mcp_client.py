@@ -0,0 +1,169 @@
+"""
+MCP Client
+Pooled async client for the Slack MCP server (streamable HTTP transport),
+used when the app executes the model's tool calls itself
+
+The client owns a private event loop on a daemon thread so synchronous
+Streamlit code can share one connection pool and run several tool calls
+concurrently.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from compactor import COMPACTED_META
+
+PROTOCOL_VERSION = "2025-03-26"
+
+
+class MCPError(RuntimeError):
+    """Raised when the MCP server returns a JSON-RPC error"""
+
+
+class MCPClient:
+    """Synchronous facade over a pooled async MCP session"""
+
+    def __init__(self, url: str, max_concurrency: int = 8, timeout: float = 120.0,
+                 compactor=None):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.compactor = compactor
+        self.session_id: Optional[str] = None
+        self._ids = itertools.count(1)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-client", daemon=True)
+        self._thread.start()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    def _run(self, coro):
+        """Run a coroutine on the client loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Accept": "application/json, text/event-stream",
+            "MCP-Protocol-Version": PROTOCOL_VERSION,
+        }
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        return headers
+
+    async def _post(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """POST one JSON-RPC message and return the matching response, if any"""
+        response = await self._http.post(self.url, json=message, headers=self._headers())
+        response.raise_for_status()
+        if "Mcp-Session-Id" in response.headers:
+            self.session_id = response.headers["Mcp-Session-Id"]
+        if "id" not in message or response.status_code == 202:
+            return None
+
+        if response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            for line in response.text.splitlines():
+                if line.startswith("data:"):
+                    payload = json.loads(line[5:])
+                    if isinstance(payload, dict) and payload.get("id") == message["id"]:
+                        return payload
+            raise MCPError(f"No response to request {message['id']} in event stream")
+        return response.json()
+
+    async def _request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                       retry: bool = True) -> Any:
+        session_id = self.session_id
+        try:
+            payload = await self._post({
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": method,
+                "params": params or {},
+            })
+        except httpx.HTTPStatusError as e:
+            # 404 means the server dropped our session (expiry or restart):
+            # start a new one and retry once
+            if e.response.status_code != 404 or session_id is None or not retry:
+                raise
+            await self._reset_session(session_id)
+            return await self._request(method, params, retry=False)
+        if "error" in payload:
+            raise MCPError(payload["error"].get("message", str(payload["error"])))
+        return payload.get("result")
+
+    async def _ensure_session(self):
+        """Create the connection pool and perform the MCP handshake once"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._init_lock = asyncio.Lock()
+
+        async with self._init_lock:
+            if self.session_id is None:
+                await self._request("initialize", {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "slack-ai-assistant", "version": "1.1.0"},
+                })
+                await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _reset_session(self, expired: str):
+        """Forget an expired session (once, however many calls saw it) and handshake again"""
+        async with self._init_lock:
+            if self.session_id == expired:
+                self.session_id = None
+        await self._ensure_session()
+
+    async def _list_tools(self) -> List[Dict[str, Any]]:
+        await self._ensure_session()
+        tools, cursor = [], None
+        while True:
+            result = await self._request("tools/list", {"cursor": cursor} if cursor else {})
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        async with self._semaphore:
+            try:
+                result = await self._request("tools/call", {"name": name, "arguments": arguments})
+            except (MCPError, httpx.HTTPError) as e:
+                return f"Error calling {name}: {e}"
+
+        text = "\n".join(item.get("text", "") for item in result.get("content", [])
+                         if item.get("type") == "text")
+        if result.get("isError"):
+            return f"Error calling {name}: {text}"
+        # Results already compacted by the MCP proxy are passed through
+        compacted = (result.get("_meta") or {}).get(COMPACTED_META)
+        if self.compactor is not None and self.compactor.applies_to(name) and not compacted:
+            text = self.compactor.compact(name, text)
+        return text
+
+    async def _call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        await self._ensure_session()
+        return await asyncio.gather(*(self._call_tool(name, arguments) for name, arguments in calls))
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Return the server's tool definitions"""
+        return self._run(self._list_tools())
+
+    def call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Run (name, arguments) tool calls concurrently; returns text outputs in order"""
+        return self._run(self._call_tools(calls))
+
+    def close(self):
+        """Close the connection pool and stop the event loop"""
+        if self._http is not None:
+            self._run(self._http.aclose())
+            self._http = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
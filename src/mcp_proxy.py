@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Compacting MCP Proxy
+HTTP proxy placed in front of the Slack MCP server (point SLACK_MCP_SERVER_URL
+at it) that compacts `tools/call` results before they reach the model and
+serves extra local tools (workspace directory, channel digests, semantic
+search) next to the Slack tools
+
+    POST /mcp    forwarded upstream; tool results are compacted and local
+                 tools are listed and answered by the proxy
+    GET  /mcp    forwarded upstream (server-sent event stream)
+    DELETE /mcp  forwarded upstream (session termination)
+    GET  /stats  bytes and tokens saved per tool, as JSON
+
+Usage:
+    python src/mcp_proxy.py
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from config import ProxyConfig
+from compactor import COMPACTED_META, Compactor
+from digests import DigestPipeline, DigestStore, model_summarizer, render_digest
+from snapshot import WorkspaceSnapshot
+from semantic_index import IndexMismatchError, SemanticIndex, create_embedder, render_results
+
+logger = logging.getLogger(__name__)
+
+# Request headers passed through to the upstream MCP server
+FORWARD_HEADERS = ("Content-Type", "Accept", "Authorization", "Mcp-Session-Id",
+                   "Mcp-Protocol-Version", "Last-Event-ID")
+# Response headers passed back to the client
+RETURN_HEADERS = ("Content-Type", "Mcp-Session-Id", "Mcp-Protocol-Version")
+
+
+@dataclass
+class LocalTool:
+    """Tool served by the proxy itself rather than the upstream MCP server"""
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Callable[[Dict[str, Any]], str]
+
+    def definition(self) -> Dict[str, Any]:
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+
+def directory_tool(snapshot: WorkspaceSnapshot) -> LocalTool:
+    """Expose the cached workspace snapshot as an MCP tool"""
+    return LocalTool(
+        name="workspace_directory",
+        description=("Cached directory of channels (id, topic, members) and users (id, name). Use it "
+                     "to answer questions about channels and people and to resolve channel or user "
+                     "ids instead of listing channels or fetching channel info."),
+        input_schema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string",
+                          "description": "Optional channel/user name or id fragment to filter by"},
+            },
+        },
+        handler=lambda arguments: snapshot.render_context(arguments.get("query")),
+    )
+
+
+def digest_tool(store: DigestStore) -> LocalTool:
+    """Expose stored channel digests as a fast MCP tool"""
+    def handler(arguments: Dict[str, Any]) -> str:
+        channel = arguments.get("channel", "")
+        digest = store.get(channel)
+        if digest is None:
+            available = ", ".join(f"#{name}" for name in store.channels()) or "none yet"
+            return f"No digest for {channel}. Channels with digests: {available}"
+        return render_digest(digest, arguments.get("since_hours"))
+
+    return LocalTool(
+        name="channel_digest",
+        description=("Instant digest of a channel's recent activity: rolling summary, decisions, "
+                     "action items and incident ids. Use it first for 'what happened in #channel' "
+                     "and action-item questions; read raw history only for details it lacks."),
+        input_schema={
+            "type": "object",
+            "properties": {
+                "channel": {"type": "string", "description": "Channel name (e.g. #tech) or id"},
+                "since_hours": {"type": "number", "description": "Only include items from the last N hours"},
+            },
+            "required": ["channel"],
+        },
+        handler=handler,
+    )
+
+
+def search_tool(index: SemanticIndex, default_k: int = 8) -> LocalTool:
+    """Expose the semantic message index as an MCP tool"""
+    def handler(arguments: Dict[str, Any]) -> str:
+        results = index.search(arguments.get("query", ""), int(arguments.get("k") or default_k),
+                               arguments.get("channel"))
+        return render_results(results)
+
+    return LocalTool(
+        name="semantic_search",
+        description=("Find Slack messages by meaning rather than keywords. Use it for paraphrased "
+                     "or vague questions (e.g. 'what went wrong with the DB pool?') before reading "
+                     "whole channel histories; follow up with thread or history reads around hits."),
+        input_schema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Natural-language description of what to find"},
+                "k": {"type": "integer", "description": f"Number of messages to return (default {default_k})"},
+                "channel": {"type": "string", "description": "Optional channel name or id to restrict to"},
+            },
+            "required": ["query"],
+        },
+        handler=handler,
+    )
+
+
+def tool_calls_by_id(body: Any) -> Dict[Any, str]:
+    """Map JSON-RPC request ids to tool names for tools/call requests"""
+    messages = body if isinstance(body, list) else [body]
+    return {
+        message.get("id"): (message.get("params") or {}).get("name", "")
+        for message in messages
+        if isinstance(message, dict) and message.get("method") == "tools/call"
+    }
+
+
+def compact_message(message: Any, calls: Dict[Any, str], compactor: Compactor) -> Any:
+    """Compact the text content of a tools/call result message"""
+    if not isinstance(message, dict) or message.get("id") not in calls:
+        return message
+    tool_name = calls[message["id"]]
+    result = message.get("result")
+    if not compactor.applies_to(tool_name) or not isinstance(result, dict):
+        return message
+
+    for item in result.get("content") or []:
+        if item.get("type") == "text" and isinstance(item.get("text"), str):
+            item["text"] = compactor.compact(tool_name, item["text"])
+    # Lets clients that compact themselves skip this result
+    result.setdefault("_meta", {})[COMPACTED_META] = True
+    return message
+
+
+def tool_lists_by_id(body: Any) -> List[Any]:
+    """Ids of tools/list requests in a JSON-RPC message or batch"""
+    messages = body if isinstance(body, list) else [body]
+    return [message.get("id") for message in messages
+            if isinstance(message, dict) and message.get("method") == "tools/list"]
+
+
+def add_local_tools(payload: Any, list_ids: Sequence[Any], local_tools: Dict[str, LocalTool]) -> Any:
+    """Append local tool definitions to tools/list results"""
+    for message in payload if isinstance(payload, list) else [payload]:
+        if isinstance(message, dict) and message.get("id") in list_ids and isinstance(message.get("result"), dict):
+            message["result"].setdefault("tools", []).extend(tool.definition() for tool in local_tools.values())
+    return payload
+
+
+def compact_payload(payload: Any, calls: Dict[Any, str], compactor: Compactor) -> Any:
+    """Compact a single JSON-RPC message or a batch"""
+    if isinstance(payload, list):
+        return [compact_message(message, calls, compactor) for message in payload]
+    return compact_message(payload, calls, compactor)
+
+
+def rewrite_sse(body: str, rewrite: Callable[[Any], Any]) -> str:
+    """Rewrite JSON-RPC messages carried in server-sent event `data:` lines"""
+    lines = []
+    for line in body.split("\n"):
+        if line.startswith("data:"):
+            try:
+                payload = json.loads(line[5:])
+            except ValueError:
+                lines.append(line)
+                continue
+            line = "data: " + json.dumps(rewrite(payload))
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def merge_local_responses(status: int, content_type: str, body: bytes,
+                          local: List[Dict[str, Any]]) -> Tuple[int, str, bytes]:
+    """Add locally answered batch responses to the upstream response"""
+    if status == 202 or not body.strip():
+        # Upstream only received notifications
+        return 200, "application/json", json.dumps(local).encode()
+    if content_type.startswith("text/event-stream"):
+        events = "".join(f"event: message\ndata: {json.dumps(message)}\n\n" for message in local)
+        return status, content_type, body.rstrip(b"\n") + b"\n\n" + events.encode()
+    payload = json.loads(body)
+    payload = payload if isinstance(payload, list) else [payload]
+    return status, content_type, json.dumps(payload + local).encode()
+
+
+class MCPProxyHandler(BaseHTTPRequestHandler):
+    """Forwards MCP traffic upstream and compacts tool results"""
+
+    config: ProxyConfig = None
+    compactor: Compactor = None
+    local_tools: Dict[str, LocalTool] = {}
+    session = requests.Session()
+
+    def _forward_headers(self) -> Dict[str, str]:
+        return {name: self.headers[name] for name in FORWARD_HEADERS if self.headers.get(name)}
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _upstream_headers(self, response) -> Dict[str, str]:
+        return {name: response.headers[name] for name in RETURN_HEADERS if name in response.headers}
+
+    def _local_call(self, message: Any):
+        """Answer a tools/call message for a local tool, or return None"""
+        if not isinstance(message, dict) or message.get("method") != "tools/call":
+            return None
+        params = message.get("params") or {}
+        tool = self.local_tools.get(params.get("name"))
+        if tool is None:
+            return None
+
+        try:
+            result = {"content": [{"type": "text", "text": tool.handler(params.get("arguments") or {})}]}
+        except Exception as e:
+            logger.exception("Local tool %s failed", tool.name)
+            result = {"content": [{"type": "text", "text": f"Error: {e}"}], "isError": True}
+        return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            body = None
+
+        # Answer local tool calls here, including those inside a batch, and
+        # forward only the remaining messages
+        messages = body if isinstance(body, list) else [body]
+        local, remaining = [], []
+        for message in messages:
+            response = self._local_call(message)
+            if response is None:
+                remaining.append(message)
+            else:
+                local.append(response)
+
+        if local and not remaining:
+            headers = {"Content-Type": "application/json"}
+            if self.headers.get("Mcp-Session-Id"):
+                headers["Mcp-Session-Id"] = self.headers["Mcp-Session-Id"]
+            payload = local if isinstance(body, list) else local[0]
+            self._send(200, json.dumps(payload).encode(), headers)
+            return
+        if local:
+            body = remaining
+            raw = json.dumps(remaining).encode()
+
+        calls = tool_calls_by_id(body) if body is not None else {}
+        list_ids = tool_lists_by_id(body) if body is not None and self.local_tools else []
+
+        response = self.session.post(self.config.upstream_url, data=raw,
+                                     headers=self._forward_headers(), timeout=300)
+        body = response.content
+        content_type = response.headers.get("Content-Type", "")
+
+        def rewrite(payload):
+            payload = add_local_tools(payload, list_ids, self.local_tools)
+            return compact_payload(payload, calls, self.compactor)
+
+        if (calls or list_ids) and response.ok:
+            try:
+                if content_type.startswith("text/event-stream"):
+                    body = rewrite_sse(response.content.decode(), rewrite).encode()
+                elif content_type.startswith("application/json"):
+                    body = json.dumps(rewrite(response.json())).encode()
+            except Exception:
+                logger.exception("Failed to rewrite MCP response; passing it through")
+                body = response.content
+
+        status, headers = response.status_code, self._upstream_headers(response)
+        if local and response.ok:
+            status, headers["Content-Type"], body = merge_local_responses(
+                status, content_type, body, local)
+        self._send(status, body, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            body = json.dumps(self.compactor.report(), indent=2).encode()
+            self._send(200, body, {"Content-Type": "application/json"})
+            return
+
+        # Stream server-initiated events straight through
+        with self.session.get(self.config.upstream_url, headers=self._forward_headers(),
+                              stream=True, timeout=None) as response:
+            self.send_response(response.status_code)
+            for name, value in self._upstream_headers(response).items():
+                self.send_header(name, value)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for chunk in response.iter_content(chunk_size=None):
+                self.wfile.write(chunk)
+                self.wfile.flush()
+
+    def do_DELETE(self):
+        response = self.session.delete(self.config.upstream_url, headers=self._forward_headers(), timeout=30)
+        self._send(response.status_code, response.content, self._upstream_headers(response))
+
+
+def create_server(config: ProxyConfig, local_tools: Sequence[LocalTool] = ()) -> ThreadingHTTPServer:
+    """Build the proxy server for the given configuration"""
+    handler = type("ConfiguredMCPProxyHandler", (MCPProxyHandler,), {
+        "config": config,
+        "compactor": Compactor(config.compactor),
+        "local_tools": {tool.name: tool for tool in local_tools},
+    })
+    return ThreadingHTTPServer((config.host, config.port), handler)
+
+
+def start_local_tools(config: ProxyConfig) -> List[LocalTool]:
+    """Start the workspace snapshot, digest pipeline and semantic index, returning their tools
+
+    The semantic index is fed by the digest pipeline's fetches, so
+    semantic_search is only served while the pipeline runs.
+    """
+    token = os.environ.get("SLACK_BOT_TOKEN")
+    if not token:
+        return []
+
+    tools = []
+    if config.snapshot.enabled:
+        snapshot = WorkspaceSnapshot.from_config(token, config.snapshot)
+        snapshot.start()
+        tools.append(directory_tool(snapshot))
+
+    if not config.digests.enabled:
+        if config.search.enabled:
+            logger.info("semantic_search disabled: the digest pipeline that feeds it is not running")
+        return tools
+
+    index = None
+    if config.search.enabled:
+        try:
+            index = SemanticIndex(config.search.directory, create_embedder(config.search))
+            tools.append(search_tool(index, config.search.default_k))
+        except IndexMismatchError as e:
+            logger.error("semantic_search disabled: %s", e)
+
+    summarizer = None
+    if config.digests.summarizer == "model":
+        from azure.identity import DefaultAzureCredential
+        from azure.ai.projects import AIProjectClient
+
+        project_client = AIProjectClient(endpoint=os.environ["FOUNDRY_PROJECT_ENDPOINT"],
+                                         credential=DefaultAzureCredential())
+        summarizer = model_summarizer(project_client.get_openai_client(),
+                                      os.environ.get("FOUNDRY_MODEL_DEPLOYMENT_NAME", "gpt-4o"))
+
+    pipeline = DigestPipeline.from_config(token, config.digests, summarizer)
+    if index is not None:
+        # Index new messages from the same incremental fetch the digests use
+        pipeline.listeners.append(lambda channel, name, messages: index.upsert([
+            {**message, "channel": channel, "channel_name": name,
+             "user": message.get("username") or pipeline.users.get(message.get("user"), message.get("user", ""))}
+            for message in messages
+        ]))
+    pipeline.start()
+    tools.append(digest_tool(pipeline.store))
+    return tools
+
+
+def main():
+    """Main function"""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    config = ProxyConfig.from_env()
+
+    local_tools = start_local_tools(config)
+    server = create_server(config, local_tools)
+    print(f"Compacting MCP proxy on http://{config.host}:{config.port}/mcp -> {config.upstream_url}")
+    if local_tools:
+        print(f"Local tools: {', '.join(tool.name for tool in local_tools)}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Semantic Message Index
+Local embedding index for semantic retrieval over Slack messages, so
+paraphrased questions find the right messages without reading whole channels
+
+Embeddings are float32 rows in a memory-mapped matrix (`vectors.f32`) with an
+append-only metadata log (`meta.jsonl`). Metadata stays on disk: memory only
+holds each row's log offset and channel code as NumPy arrays, and records are
+read back for the top-k hits. Upserts overwrite a message's row in place, and
+search is an exact NumPy dot product with top-k selection.
+`index.json` records which embedder and dimension wrote the vectors; an index
+is never opened with a different one.
+
+Backfill from exporter spools (scripts/export_workspace.py):
+    python src/semantic_index.py data/export/messages/*.jsonl
+    python src/semantic_index.py --rebuild data/export/messages/*.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import SearchConfig
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: signed feature hashing of words and character trigrams"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = "hashing"
+
+    def _features(self, text: str) -> List[int]:
+        words = _TOKEN.findall(text.lower())
+        grams = [f"#{word}#"[i:i + 3] for word in words for i in range(len(word))]
+        return [zlib.crc32(feature.encode()) for feature in words + grams]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(features)
+        rows = np.asarray(rows, dtype=np.int64)
+        hashes = np.asarray(hashes, dtype=np.int64)
+
+        signs = np.where(hashes & (1 << 31), -1.0, 1.0)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (rows, hashes % self.dim), signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """CPU sentence-transformers model (requires the sentence-transformers package)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder(config: SearchConfig):
+    """Use the configured model if available, else fall back to feature hashing"""
+    if config.model:
+        try:
+            return SentenceTransformerEmbedder(config.model)
+        except ImportError:
+            pass
+    return HashingEmbedder(config.dim)
+
+
+class IndexMismatchError(ValueError):
+    """Raised when an index directory was written by a different embedder or dimension"""
+
+
+class SemanticIndex:
+    """Memory-mapped embedding matrix with incremental upserts and top-k search"""
+
+    def __init__(self, directory: str, embedder, initial_capacity: int = 1024,
+                 rebuild: bool = False):
+        self.directory = directory
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "meta.jsonl")
+        self.manifest_path = os.path.join(directory, "index.json")
+        self.rows: Dict[str, int] = {}
+        self.size = 0
+        # Per row: byte offset of its latest record in meta.jsonl, and its channel code
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.channel_codes = np.zeros(0, dtype=np.int32)
+        # Channel ids and names to channel codes
+        self.channels: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._check_manifest(rebuild)
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    record = json.loads(line)
+                    self._set_row(record["row"], record, offset)
+                    offset += len(line)
+
+        capacity = max(initial_capacity, self.size)
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // (4 * self.dim))
+        self._open(capacity)
+
+    def _check_manifest(self, rebuild: bool):
+        """Refuse (or, with rebuild, wipe) an index written by another embedder"""
+        manifest = {"embedder": self.embedder.name, "dim": self.dim}
+        stored = None
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                stored = json.load(f)
+        has_data = os.path.exists(self.meta_path) or os.path.exists(self.vectors_path)
+
+        if has_data and stored != manifest and not rebuild:
+            found = f"{stored['embedder']} (dim {stored['dim']})" if stored else "an unknown embedder"
+            raise IndexMismatchError(
+                f"{self.directory} was built with {found}, not {manifest['embedder']} "
+                f"(dim {manifest['dim']}); rebuild it with --rebuild"
+            )
+        if rebuild:
+            for path in (self.meta_path, self.vectors_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+    def _channel_code(self, channel: str, channel_name: str) -> int:
+        code = self.channels.setdefault(channel, len(self.channels))
+        if channel_name:
+            self.channels.setdefault(channel_name, code)
+        return code
+
+    def _resize_columns(self, capacity: int):
+        if capacity > len(self.offsets):
+            grow = capacity - len(self.offsets)
+            self.offsets = np.concatenate([self.offsets, np.zeros(grow, dtype=np.int64)])
+            self.channel_codes = np.concatenate([self.channel_codes, np.full(grow, -1, dtype=np.int32)])
+
+    def _set_row(self, row: int, record: Dict[str, Any], offset: int):
+        """Point a row at its metadata record"""
+        if row >= len(self.offsets):
+            self._resize_columns(max(row + 1, 2 * len(self.offsets)))
+        self.offsets[row] = offset
+        self.channel_codes[row] = self._channel_code(record["channel"], record.get("channel_name", ""))
+        self.rows[record["key"]] = row
+        self.size = max(self.size, row + 1)
+
+    def _read_meta(self, rows: Sequence[int]) -> List[Dict[str, Any]]:
+        """Read the metadata records of the given rows from the log"""
+        records = []
+        with open(self.meta_path, "rb") as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                record = json.loads(f.readline())
+                record.pop("row")
+                records.append(record)
+        return records
+
+    def _open(self, capacity: int):
+        """(Re)map the vector file with room for `capacity` rows"""
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        if mode == "r+" and os.path.getsize(self.vectors_path) < capacity * self.dim * 4:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self._resize_columns(capacity)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def upsert(self, messages: Sequence[Dict[str, Any]]) -> int:
+        """Embed and store messages keyed by channel and ts; returns the count written"""
+        messages = [message for message in messages if message.get("text")]
+        if not messages:
+            return 0
+        vectors = self.embedder.embed([message["text"] for message in messages])
+
+        with self._lock:
+            needed = self.size + len(messages)
+            if needed > self.capacity:
+                self.matrix.flush()
+                self._open(max(needed, self.capacity * 2))
+
+            with open(self.meta_path, "ab") as meta_log:
+                meta_log.seek(0, os.SEEK_END)
+                for message, vector in zip(messages, vectors):
+                    key = f"{message['channel']}:{message['ts']}"
+                    record = {
+                        "key": key,
+                        "channel": message["channel"],
+                        "channel_name": message.get("channel_name", ""),
+                        "ts": message["ts"],
+                        "user": message.get("user", ""),
+                        "text": message["text"][:500],
+                    }
+                    row = self.rows.get(key, self.size)
+                    offset = meta_log.tell()
+                    meta_log.write((json.dumps({"row": row, **record}, ensure_ascii=False) + "\n").encode())
+                    self._set_row(row, record, offset)
+                    self.matrix[row] = vector
+            self.matrix.flush()
+        return len(messages)
+
+    def search(self, query: str, k: int = 8, channel: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the k most similar messages (cosine similarity)"""
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            size = self.size
+            if size == 0:
+                return []
+            scores = np.asarray(self.matrix[:size] @ query_vector)
+            if channel:
+                code = self.channels.get(channel.lstrip("#"))
+                if code is None:
+                    return []
+                scores = np.where(self.channel_codes[:size] == code, scores, -np.inf)
+
+            k = max(1, min(k, size))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = [row for row in top[np.argsort(-scores[top])] if np.isfinite(scores[row])]
+            return [{**record, "score": float(scores[row])}
+                    for row, record in zip(top, self._read_meta(top))]
+
+
+def render_results(results: List[Dict[str, Any]]) -> str:
+    """Render search hits compactly for the model"""
+    if not results:
+        return "No matching messages."
+    return "\n".join(
+        f"[{hit['score']:.2f}] #{hit.get('channel_name') or hit['channel']} ts={hit['ts']} "
+        f"{hit['user']}: {hit['text']}"
+        for hit in results
+    )
+
+
+def backfill(index: SemanticIndex, paths: Sequence[str], batch_size: int = 256) -> int:
+    """Upsert messages from exporter JSONL spools in batches"""
+    total = 0
+    for path in paths:
+        batch = []
+        with open(path) as spool:
+            for line in spool:
+                record = json.loads(line)
+                batch.append({**record, "user": record.get("username", "")})
+                if len(batch) >= batch_size:
+                    total += index.upsert(batch)
+                    batch = []
+        total += index.upsert(batch)
+    return total
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Backfill the semantic index from exporter spools")
+    parser.add_argument("spools", nargs="*", help="Exporter JSONL spools")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Discard the existing index (e.g. after changing SEMANTIC_MODEL or SEMANTIC_DIM)")
+    args = parser.parse_args()
+
+    config = SearchConfig.from_env()
+    try:
+        index = SemanticIndex(config.directory, create_embedder(config), rebuild=args.rebuild)
+    except IndexMismatchError as e:
+        sys.exit(f"✗ {e}")
+    count = backfill(index, args.spools)
+    print(f"✓ Indexed {count} messages ({len(index)} total) in {config.directory}")
+
+
+if __name__ == "__main__":
+    main()
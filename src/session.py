@@ -1,17 +1,101 @@
 """
 Session State Management
 Handles Streamlit session state initialization and management
+
+Chat history, response ids, pending queries and the agent registry entry live
+in the shared session store, keyed by the `sid` query parameter, so any
+frontend replica can pick up a session. Live agent handles are owned by the
+process-wide session manager, which closes idle and least recently used ones;
+`st.session_state` only points at the current handle for the UI.
+
+Every turn is also written to the persistent history log. The session store
+only holds the most recent turns; older pages are read from the log when the
+user asks for them.
 """
 
+import time
+import uuid
 import streamlit as st
-from config import AppConfig
-from agent import SlackAgent
+from config import AppConfig, SessionConfig, HistoryConfig, LifecycleConfig
+from agent import SlackAgent, create_mcp_client, create_project_client, delete_agent_version
+from lifecycle import SessionManager
+from store import SessionStore, create_store
+from history import HistoryLog
+
+
+@st.cache_resource
+def get_store() -> SessionStore:
+    """Process-wide session store"""
+    return create_store(SessionConfig.from_env())
+
+
+@st.cache_resource
+def get_history() -> HistoryLog:
+    """Process-wide persistent history log"""
+    config = HistoryConfig.from_env()
+    return HistoryLog(config.directory, config.page_size)
+
+
+@st.cache_resource
+def get_mcp_client():
+    """Process-wide pooled MCP client shared by all sessions (client mode only)"""
+    return create_mcp_client(AppConfig.from_env())
+
+
+@st.cache_resource
+def get_session_manager() -> SessionManager:
+    """Process-wide registry of live agent handles"""
+    config = LifecycleConfig.from_env()
+    store = get_store()
+    project_client = None
+
+    def delete_version(agent_name: str, agent_version: str) -> bool:
+        # SessionManager serializes deletions, so the lazy client needs no lock
+        nonlocal project_client
+        if project_client is None:
+            project_client = create_project_client(AppConfig.from_env())
+        return delete_agent_version(project_client, agent_name, agent_version)
+
+    def on_evict(session_id: str) -> bool:
+        # Keep the agent version if the session is still active on another replica
+        state = store.get_state(session_id)
+        if time.time() - state.get("last_active", 0) < config.idle_timeout_seconds:
+            return False
+        if "agent" in state:
+            store.set_state(session_id, agent=None)
+        return True
+
+    manager = SessionManager(config, delete_version, on_evict)
+    manager.start()
+    return manager
+
+
+def get_user_id() -> str:
+    """Return the owner of this session's history index
+
+    Uses the logged-in identity when Streamlit authentication is configured;
+    otherwise history is private to the session id.
+    """
+    user = getattr(st, "user", None)
+    if user is not None and user.get("is_logged_in"):
+        identity = user.get("email") or user.get("sub")
+        if identity:
+            return f"user-{identity}"
+    return f"session-{get_session_id()}"
+
+
+def get_session_id() -> str:
+    """Return the session id, persisting it in the URL so replicas can share it"""
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get("sid") or uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
 
 
 def initialize_session_state():
     """Initialize all session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    get_session_id()
     if "agent" not in st.session_state:
         st.session_state.agent = None
     if "agent_manager" not in st.session_state:
@@ -20,15 +104,36 @@ def initialize_session_state():
 
 def initialize_agent():
     """Initialize the Azure AI Foundry agent with Slack MCP tools"""
-    if st.session_state.agent is not None:
-        return st.session_state.agent
+    manager = get_session_manager()
+    session_id = get_session_id()
+    agent_manager = manager.get(session_id)
+    if agent_manager is not None and agent_manager.agent is not None:
+        st.session_state.agent_manager = agent_manager
+        st.session_state.agent = agent_manager.agent
+        return agent_manager.agent
+
+    store = get_store()
+    registry = store.get_state(session_id).get("agent")
 
     with st.spinner("🔌 Connecting to Azure AI Foundry..."):
         try:
             config = AppConfig.from_env()
-            agent_manager = SlackAgent(config)
-            agent = agent_manager.initialize()
+            agent_manager = SlackAgent(config, get_mcp_client())
+            agent = None
+
+            if registry:
+                try:
+                    agent = agent_manager.attach(
+                        registry["name"], registry["version"], registry.get("conversation_id")
+                    )
+                except Exception:
+                    agent = None
+
+            if agent is None:
+                agent = agent_manager.initialize()
+                store.set_state(session_id, agent=agent_manager.registry_entry())
 
+            manager.register(session_id, agent_manager)
             st.session_state.agent_manager = agent_manager
             st.session_state.agent = agent
 
@@ -39,15 +144,103 @@ def initialize_agent():
             return None
 
 
+def send_to_agent(user_input):
+    """Send a message to this session's agent, keeping it from being evicted mid-request"""
+    agent_manager = st.session_state.agent_manager
+    with get_session_manager().in_use(agent_manager):
+        return agent_manager.send_message(user_input)
+
+
+def get_messages():
+    """Return the most recent chat messages for this session"""
+    return get_store().get_messages(get_session_id())
+
+
+def append_message(message):
+    """Append a message to the session and the persistent history log"""
+    store = get_store()
+    session_id = get_session_id()
+    history_id = store.get_state(session_id).get("history_id")
+
+    if history_id is None:
+        history_id = get_history().start_conversation(get_user_id(), message.get("content", ""))
+        store.set_state(session_id, history_id=history_id)
+
+    get_history().append(get_user_id(), history_id, message)
+    store.append_message(session_id, message)
+    store.set_state(session_id, last_active=time.time())
+
+
+def get_earlier_messages():
+    """Return older messages the user has paged in, and whether more exist"""
+    state = get_store().get_state(get_session_id())
+    history_id = state.get("history_id")
+    if history_id is None:
+        return [], False
+
+    history = get_history()
+    user_id = get_user_id()
+    tail_start = history.count(user_id, history_id) - len(get_messages())
+    start = max(0, tail_start - state.get("history_pages", 0) * history.page_size)
+    return history.read(user_id, history_id, start, tail_start), start > 0
+
+
+def load_earlier_messages():
+    """Page one more block of older messages in from the history log"""
+    store = get_store()
+    session_id = get_session_id()
+    pages = store.get_state(session_id).get("history_pages", 0)
+    store.set_state(session_id, history_pages=pages + 1)
+
+
+def list_conversations():
+    """Return this user's saved conversations, newest first"""
+    return get_history().list_conversations(get_user_id())
+
+
+def open_conversation(history_id):
+    """Reopen a saved conversation, loading only its last page"""
+    store = get_store()
+    session_id = get_session_id()
+    turns, _ = get_history().load_page(get_user_id(), history_id)
+
+    store.clear_messages(session_id)
+    for turn in turns:
+        store.append_message(session_id, turn)
+    store.set_state(session_id, history_id=history_id, history_pages=None)
+
+
+def set_pending_query(query):
+    """Queue a query (e.g. from a sample button) for the next rerun"""
+    get_store().set_state(get_session_id(), pending_query=query)
+
+
+def pop_pending_query():
+    """Return and clear the queued query, if any"""
+    store = get_store()
+    session_id = get_session_id()
+    query = store.get_state(session_id).get("pending_query")
+    if query is not None:
+        store.set_state(session_id, pending_query=None)
+    return query
+
+
 def reset_agent():
     """Reset agent and clear session state"""
-    if st.session_state.agent_manager:
-        st.session_state.agent_manager.cleanup()
+    get_session_manager().release(get_session_id())
     st.session_state.agent = None
     st.session_state.agent_manager = None
-    st.session_state.messages = []
+    get_store().delete_session(get_session_id())
+
+
+def session_stats():
+    """Live session count and process memory for this replica"""
+    return get_session_manager().stats()
 
 
 def clear_chat_history():
-    """Clear chat message history"""
-    st.session_state.messages = []
+    """Clear chat message history and start a new saved conversation"""
+    store = get_store()
+    session_id = get_session_id()
+    store.clear_messages(session_id)
+    store.set_state(session_id, history_id=None, history_pages=None)
@@ -0,0 +1,41 @@
+"""
+Slack Web API Helpers
+Shared client construction and cursor pagination for background workers
+"""
+
+from typing import Any, Callable, Dict, Iterator
+
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+
+def create_client(token: str, max_retries: int = 3) -> WebClient:
+    """Create a Slack client that backs off and retries on HTTP 429"""
+    client = WebClient(token=token)
+    client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=max_retries))
+    return client
+
+
+def paginate(method: Callable[..., Any], key: str, limit: int = 200, **kwargs) -> Iterator[Dict[str, Any]]:
+    """Yield items under `key` from every page of a cursor-paginated Slack method"""
+    cursor = None
+    while True:
+        response = method(limit=limit, cursor=cursor, **kwargs)
+        yield from response.get(key, [])
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return
+
+
+def iter_history(client: WebClient, channel: str, oldest: str = "0") -> Iterator[Dict[str, Any]]:
+    """Yield top-level channel messages newer than `oldest`, newest first"""
+    yield from paginate(client.conversations_history, "messages", channel=channel, oldest=oldest)
+
+
+def user_names(client: WebClient) -> Dict[str, str]:
+    """Map user ids to display names"""
+    return {
+        user["id"]: user.get("real_name") or user.get("name", user["id"])
+        for user in paginate(client.users_list, "members")
+        if not user.get("deleted")
+    }
@@ -0,0 +1,139 @@
+"""
+Workspace Snapshot
+Background refresher keeping a compact in-memory directory of channels,
+channel members and users, served by the MCP proxy as the `workspace_directory`
+tool so common questions skip the list-channels / channel-info round trips
+and every frontend replica shares one refresher
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from config import SnapshotConfig
+from slack_api import create_client, paginate, user_names
+
+logger = logging.getLogger(__name__)
+
+
+class WorkspaceSnapshot:
+    """Periodically refreshed view of channels, members and users"""
+
+    def __init__(self, client, config: SnapshotConfig):
+        self.client = client
+        self.config = config
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self.users: Dict[str, str] = {}
+        self.refreshed_at: Optional[float] = None
+        self._refreshes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, token: str, config: SnapshotConfig) -> "WorkspaceSnapshot":
+        """Create a snapshot backed by a rate-limit aware Slack client"""
+        return cls(create_client(token), config)
+
+    def start(self):
+        """Refresh in a daemon thread every config.interval_seconds"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="workspace-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except SlackApiError as e:
+                logger.warning("Workspace snapshot refresh failed: %s", e.response.get("error"))
+            except Exception:
+                logger.exception("Workspace snapshot refresh failed")
+            self._stop.wait(self.config.interval_seconds)
+
+    def refresh(self):
+        """Refresh channels, re-fetching members only for channels that changed"""
+        channels = {}
+        for channel in paginate(self.client.conversations_list, "channels",
+                                types="public_channel,private_channel", exclude_archived=True):
+            previous = self.channels.get(channel["id"])
+            entry = {
+                "name": channel.get("name", channel["id"]),
+                "topic": (channel.get("topic") or {}).get("value", ""),
+                "purpose": (channel.get("purpose") or {}).get("value", ""),
+                "num_members": channel.get("num_members", 0),
+                "updated": channel.get("updated"),
+                "members": [],
+            }
+            unchanged = (previous is not None
+                         and previous["updated"] == entry["updated"]
+                         and previous["num_members"] == entry["num_members"])
+            if unchanged:
+                entry["members"] = previous["members"]
+            elif channel.get("is_member"):
+                entry["members"] = list(paginate(self.client.conversations_members, "members",
+                                                 channel=channel["id"]))
+            channels[channel["id"]] = entry
+
+        # The user list changes rarely; refresh it every few channel refreshes
+        users = None
+        if self._refreshes % max(1, self.config.users_every) == 0:
+            users = user_names(self.client)
+
+        with self._lock:
+            self.channels = channels
+            if users is not None:
+                self.users = users
+            self.refreshed_at = time.time()
+            self._refreshes += 1
+
+    def render_context(self, query: Optional[str] = None) -> str:
+        """Render the snapshot as a compact workspace directory for the agent
+
+        With `query`, only channels and users whose name, id, topic or purpose
+        contain it (case-insensitive) are listed.
+        """
+        with self._lock:
+            if self.refreshed_at is None:
+                return "Workspace directory not loaded yet."
+            channels = sorted(self.channels.items(), key=lambda item: item[1]["name"])
+            users = dict(self.users)
+            refreshed = datetime.fromtimestamp(self.refreshed_at, tz=timezone.utc)
+
+        names = users
+        if query:
+            needle = query.lower().lstrip("#@")
+            channels = [(channel_id, channel) for channel_id, channel in channels
+                        if any(needle in text.lower() for text in
+                               (channel_id, channel["name"], channel["topic"], channel["purpose"]))]
+            users = {user_id: name for user_id, name in users.items()
+                     if needle in user_id.lower() or needle in name.lower()}
+
+        lines = [f"Workspace directory (snapshot {refreshed:%Y-%m-%d %H:%M} UTC):", "Channels:"]
+        for channel_id, channel in channels[:self.config.max_channels]:
+            line = f"- #{channel['name']} ({channel_id}, {channel['num_members']} members)"
+            if channel["topic"] or channel["purpose"]:
+                line += f": {(channel['topic'] or channel['purpose'])[:80]}"
+            members = [names.get(member, member) for member in channel["members"][:self.config.max_members]]
+            if members:
+                more = len(channel["members"]) - len(members)
+                line += f" | members: {', '.join(members)}" + (f" +{more}" if more > 0 else "")
+            lines.append(line)
+        if len(channels) > self.config.max_channels:
+            lines.append(f"- ... {len(channels) - self.config.max_channels} more channels")
+
+        if users:
+            listed = sorted(users.items())[:self.config.max_users]
+            line = "Users: " + ", ".join(f"{name} ({user_id})" for user_id, name in listed)
+            if len(users) > len(listed):
+                line += f", ... {len(users) - len(listed)} more"
+            lines.append(line)
+        return "\n".join(lines)
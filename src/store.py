@@ -0,0 +1,286 @@
+"""
+Session Store
+Pluggable storage for chat history, response ids and agent registry entries,
+so any frontend replica can serve any user session
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import SessionConfig
+
+
+class SessionStore:
+    """Base interface for session state storage"""
+
+    def __init__(self, max_messages: int = 200, ttl_seconds: int = 86400):
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+
+    def get_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return the stored chat messages for a session, oldest first"""
+        raise NotImplementedError
+
+    def append_message(self, session_id: str, message: Dict[str, Any]):
+        """Append a chat message, keeping at most max_messages"""
+        raise NotImplementedError
+
+    def clear_messages(self, session_id: str):
+        """Remove all chat messages for a session"""
+        raise NotImplementedError
+
+    def get_state(self, session_id: str) -> Dict[str, Any]:
+        """Return scalar session fields (agent registry, response ids, pending query)"""
+        raise NotImplementedError
+
+    def set_state(self, session_id: str, **fields):
+        """Update scalar session fields; a value of None removes the field"""
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str):
+        """Remove everything stored for a session"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store (default); sessions are LRU-bounded per replica"""
+
+    def __init__(self, max_messages: int = 200, ttl_seconds: int = 86400,
+                 max_sessions: int = 500):
+        super().__init__(max_messages, ttl_seconds)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str) -> Dict[str, Any]:
+        """Fetch (or create) a session entry and mark it recently used"""
+        now = time.time()
+        entry = self._sessions.get(session_id)
+        if entry is None or now - entry["touched"] > self.ttl_seconds:
+            entry = {"messages": [], "state": {}, "touched": now}
+            self._sessions[session_id] = entry
+        entry["touched"] = now
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return entry
+
+    def _peek(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a live session entry without creating, touching or evicting anything"""
+        entry = self._sessions.get(session_id)
+        if entry is None or time.time() - entry["touched"] > self.ttl_seconds:
+            return None
+        return entry
+
+    def get_messages(self, session_id):
+        with self._lock:
+            entry = self._peek(session_id)
+            return list(entry["messages"]) if entry else []
+
+    def append_message(self, session_id, message):
+        with self._lock:
+            messages = self._session(session_id)["messages"]
+            messages.append(message)
+            del messages[:-self.max_messages]
+
+    def clear_messages(self, session_id):
+        with self._lock:
+            self._session(session_id)["messages"] = []
+
+    def get_state(self, session_id):
+        with self._lock:
+            entry = self._peek(session_id)
+            return dict(entry["state"]) if entry else {}
+
+    def set_state(self, session_id, **fields):
+        with self._lock:
+            state = self._session(session_id)["state"]
+            for key, value in fields.items():
+                if value is None:
+                    state.pop(key, None)
+                else:
+                    state[key] = value
+
+    def delete_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store; replicas sharing the database file share sessions"""
+
+    def __init__(self, path: str, max_messages: int = 200, ttl_seconds: int = 86400):
+        super().__init__(max_messages, ttl_seconds)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "session_id TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, seq)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "session_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, touched REAL NOT NULL)"
+            )
+
+    def _touch(self, session_id: str):
+        """Record activity and drop sessions idle for longer than the TTL"""
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, touched) VALUES (?, ?)",
+            (session_id, now),
+        )
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT session_id FROM sessions WHERE touched < ?", (now - self.ttl_seconds,)
+        )]
+        for expired_id in expired:
+            self._delete(expired_id)
+
+    def _delete(self, session_id: str):
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM state WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def get_messages(self, session_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def append_message(self, session_id, message):
+        with self._lock:
+            self._touch(session_id)
+            self._conn.execute(
+                "INSERT INTO messages (session_id, body) VALUES (?, ?)",
+                (session_id, json.dumps(message)),
+            )
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq NOT IN ("
+                "SELECT seq FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages),
+            )
+
+    def clear_messages(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def get_state(self, session_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM state WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_state(self, session_id, **fields):
+        with self._lock:
+            self._touch(session_id)
+            for key, value in fields.items():
+                if value is None:
+                    self._conn.execute(
+                        "DELETE FROM state WHERE session_id = ? AND key = ?",
+                        (session_id, key),
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO state (session_id, key, value) VALUES (?, ?, ?)",
+                        (session_id, key, json.dumps(value)),
+                    )
+
+    def delete_session(self, session_id):
+        with self._lock:
+            self._delete(session_id)
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-backed store for horizontally scaled frontends"""
+
+    def __init__(self, client, max_messages: int = 200, ttl_seconds: int = 86400,
+                 prefix: str = "slack-ai:session"):
+        super().__init__(max_messages, ttl_seconds)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSessionStore":
+        """Connect using a redis:// URL (requires the redis package)"""
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, session_id: str, kind: str) -> str:
+        return f"{self.prefix}:{session_id}:{kind}"
+
+    def get_messages(self, session_id):
+        raw = self.client.lrange(self._key(session_id, "messages"), 0, -1)
+        return [json.loads(item) for item in raw]
+
+    def append_message(self, session_id, message):
+        key = self._key(session_id, "messages")
+        pipe = self.client.pipeline()
+        pipe.rpush(key, json.dumps(message))
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(self._key(session_id, "state"), self.ttl_seconds)
+        pipe.execute()
+
+    def clear_messages(self, session_id):
+        self.client.delete(self._key(session_id, "messages"))
+
+    def get_state(self, session_id):
+        raw = self.client.hgetall(self._key(session_id, "state"))
+        return {_text(key): json.loads(value) for key, value in raw.items()}
+
+    def set_state(self, session_id, **fields):
+        key = self._key(session_id, "state")
+        pipe = self.client.pipeline()
+        for field, value in fields.items():
+            if value is None:
+                pipe.hdel(key, field)
+            else:
+                pipe.hset(key, field, json.dumps(value))
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(self._key(session_id, "messages"), self.ttl_seconds)
+        pipe.execute()
+
+    def delete_session(self, session_id):
+        self.client.delete(self._key(session_id, "messages"), self._key(session_id, "state"))
+
+
+def _text(value) -> str:
+    """Decode redis bytes keys"""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def create_store(config: SessionConfig) -> SessionStore:
+    """Build a session store from a URL (memory://, sqlite:///path, redis://host)"""
+    scheme = urlparse(config.store_url).scheme
+    options = {"max_messages": config.max_messages, "ttl_seconds": config.ttl_seconds}
+
+    if scheme in ("", "memory"):
+        return MemorySessionStore(max_sessions=config.max_sessions, **options)
+    if scheme == "sqlite":
+        return SQLiteSessionStore(config.store_url[len("sqlite:///"):] or ":memory:", **options)
+    if scheme in ("redis", "rediss"):
+        return RedisSessionStore.from_url(config.store_url, **options)
+
+    raise ValueError(f"Unsupported session store URL: {config.store_url}")
@@ -4,13 +4,17 @@ Handles chat display and message interactions
 """
 
 import streamlit as st
+from session import (
+    get_messages, append_message, pop_pending_query,
+    get_earlier_messages, load_earlier_messages, send_to_agent
+)
 from .response import display_response
 
 
 def send_message(user_input):
     """Send a message to the agent"""
     try:
-        response = st.session_state.agent_manager.send_message(user_input)
+        response = send_to_agent(user_input)
         return response
     except Exception as e:
         st.error(f"Error: {e}")
@@ -37,7 +41,13 @@ def render_chat_interface():
 
 def _display_chat_history():
     """Display existing chat messages"""
-    for message in st.session_state.messages:
+    earlier, has_more = get_earlier_messages()
+    if has_more:
+        if st.button("⬆️ Load earlier messages", key="load_earlier"):
+            load_earlier_messages()
+            st.rerun()
+
+    for message in earlier + get_messages():
         role = message["role"]
         content = message["content"]
 
@@ -49,10 +59,8 @@ def _display_chat_history():
 
 def _handle_pending_query():
     """Handle queries from sample buttons"""
-    if hasattr(st.session_state, 'pending_query'):
-        prompt = st.session_state.pending_query
-        del st.session_state.pending_query
-
+    prompt = pop_pending_query()
+    if prompt is not None:
         _process_user_message(prompt)
         st.rerun()
 
@@ -68,12 +76,13 @@ def _process_user_message(prompt):
     # Display user message
     with st.chat_message("user"):
         st.markdown(prompt)
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    append_message({"role": "user", "content": prompt})
 
     # Get and display agent response
     with st.spinner("🤔 Thinking..."):
         response = send_message(prompt)
-        display_response(response)
+        agent_manager = st.session_state.agent_manager
+        display_response(response, agent_manager.last_tool_calls, agent_manager.last_usage)
 
 
 def _display_error_state():
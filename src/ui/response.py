@@ -4,6 +4,7 @@ Handles agent response formatting and rendering
 """
 
 import streamlit as st
+from session import append_message
 
 
 def format_tool_call(item):
@@ -16,12 +17,31 @@ def format_tool_call(item):
     return None
 
 
-def display_response(response):
-    """Display the agent's response with enhanced formatting"""
+def _usage_summary(response):
+    """Extract token usage counts for the history log"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "total_tokens": usage.total_tokens
+    }
+
+
+def display_response(response, client_tool_calls=None, usage=None):
+    """Display the agent's response with enhanced formatting
+
+    `usage` is the token usage summed over all client-mode tool rounds; it
+    defaults to the final response's own usage.
+    """
     if response is None:
         return
+    usage = usage or _usage_summary(response)
 
-    tool_calls = []
+    # Tool calls executed by the app itself (client-side MCP mode)
+    tool_calls = [f"**Tool:** `{name}` (Client: `slack`)" for name in client_tool_calls or []]
+    pending_calls = 0
 
     # Process output items
     if hasattr(response, 'output') and response.output:
@@ -37,12 +57,23 @@ def display_response(response):
             elif item.type == 'mcp_approval_request':
                 st.warning("⚠️ **Approval Required:** The agent needs permission to execute this tool.")
 
+            elif item.type == 'function_call':
+                pending_calls += 1
+
     # Display tool calls
     if tool_calls:
         with st.expander("🔄 Tool Calls", expanded=False):
             for i, tool_call in enumerate(tool_calls, 1):
                 st.markdown(f"{i}. {tool_call}")
 
+    # Client mode ran out of tool rounds before the model answered
+    if pending_calls and not response.output_text:
+        st.warning(
+            f"⚠️ **No answer:** the agent still wanted {pending_calls} more tool call(s) after "
+            "the maximum number of tool rounds. Try a narrower question or raise "
+            "`SLACK_MCP_MAX_TOOL_ROUNDS`."
+        )
+
     # Display main response
     if response.output_text:
         with st.chat_message("assistant"):
@@ -52,14 +83,16 @@ def display_response(response):
             if hasattr(response, 'id'):
                 with st.expander("📊 Trace Information", expanded=False):
                     st.caption(f"Response ID: `{response.id}`")
-                    if hasattr(response, 'usage'):
-                        st.caption(f"Tokens: {response.usage.total_tokens} total "
-                                 f"({response.usage.input_tokens} input, "
-                                 f"{response.usage.output_tokens} output)")
+                    if usage:
+                        st.caption(f"Tokens: {usage['total_tokens']} total "
+                                 f"({usage['input_tokens']} input, "
+                                 f"{usage['output_tokens']} output)")
 
-        # Store in session state
-        st.session_state.messages.append({
+        # Store in the shared session store
+        append_message({
             "role": "assistant",
             "content": response.output_text,
-            "tool_calls": len(tool_calls)
+            "tool_calls": len(tool_calls),
+            "response_id": getattr(response, 'id', None),
+            "usage": usage
         })
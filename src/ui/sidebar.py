@@ -5,7 +5,10 @@ Renders the Streamlit sidebar with configuration and controls
 
 import os
 import streamlit as st
-from session import reset_agent, clear_chat_history
+from session import (
+    reset_agent, clear_chat_history, set_pending_query,
+    list_conversations, open_conversation, session_stats
+)
 
 
 def render_sidebar():
@@ -22,6 +25,9 @@ def render_sidebar():
         _render_sample_queries()
         st.divider()
 
+        _render_conversations()
+        st.divider()
+
         _render_controls()
         st.divider()
 
@@ -37,12 +43,20 @@ def _render_agent_status():
 **Version:** {st.session_state.agent.version}
 **Model:** {os.environ.get('FOUNDRY_MODEL_DEPLOYMENT_NAME', 'gpt-4o')}
 **Auto-Approval:** ✅ ENABLED
+**MCP Mode:** {os.environ.get('SLACK_MCP_MODE', 'server')}
 """)
         if st.session_state.agent_manager and st.session_state.agent_manager.conversation_id:
             st.caption(f"Conversation: `{st.session_state.agent_manager.conversation_id[:8]}...`")
     else:
         st.warning("⚠️ Agent Not Initialized")
 
+    stats = session_stats()
+    st.caption(
+        f"🧹 {stats['live_sessions']}/{stats['max_sessions']} live sessions · "
+        f"{stats['memory_mb']:.0f} MB · {stats['pending_deletes']} pending / "
+        f"{stats['retained_versions']} retained agent versions"
+    )
+
 
 def _render_mcp_status():
     """Display MCP server status"""
@@ -71,10 +85,30 @@ def _render_sample_queries():
 
     for sample in samples:
         if st.button(f"💬 {sample}", key=sample, use_container_width=True):
-            st.session_state.pending_query = sample
+            set_pending_query(sample)
             st.rerun()
 
 
+def _render_conversations():
+    """Display saved conversations that can be reopened"""
+    st.subheader("🗂️ Conversations")
+    conversations = list_conversations()
+    if not conversations:
+        st.caption("No saved conversations yet")
+        return
+
+    titles = {c["id"]: c.get("title") or c["id"] for c in conversations}
+    selected = st.selectbox(
+        "Saved conversations",
+        options=list(titles),
+        format_func=lambda cid: titles[cid][:40],
+        label_visibility="collapsed"
+    )
+    if st.button("📂 Open", use_container_width=True, help="Reopen this conversation"):
+        open_conversation(selected)
+        st.rerun()
+
+
 def _render_controls():
     """Display control buttons"""
     col1, col2 = st.columns(2)